@@ -1,10 +1,23 @@
-from core.distributions import Normal
+from core.distributions import Normal, DiscreteDistribution, DiagonalNormal
+from core.conditional_distributions import ConditionalDiscrete, ConditionalModalities
 from core.optimizers import SGD
 from abc import ABC, abstractmethod
+from collections import namedtuple
 import numpy as np
 
+# Outcome of Agent.minimize_vfe: iterations taken, VFE and gradient norm at the end,
+# whether a tolerance was met (False: stopped by max_iterations), and the last accepted step size
+InferenceDiagnostics = namedtuple('InferenceDiagnostics', ['iterations', 'vfe', 'converged', 'gradient_norm', 'step_size'])
+
 class Agent(ABC):
-    def __init__(self, q_learning_rate=0.1):
+    def __init__(self, q_learning_rate=0.1, optimizers=None):
+        """
+        Args:
+            q_learning_rate: learning rate of the default SGD optimizer of q(x)
+            optimizers: optional dict overriding the optimizers by role, 'q', 'px' and/or 'py_x',
+                        e.g. {'q': NaturalGradient(), 'py_x': Adam(0.01)} (see core.optimizers)
+        """
+        optimizers = optimizers or {}
         # Distributions to be initialized by subclasses
         self.px = None  # Prior over x
         self.qx = None  # Approximate posterior over x
@@ -12,9 +25,10 @@ class Agent(ABC):
         self.py_x = None  # Observation model
         
         # Create optimizers
-        self.q_optimizer = SGD(learning_rate=q_learning_rate)  # For q_mu and q_var
-        self.px_optimizer = SGD(learning_rate=0.01)  # For p(x) mean
-        self.py_x_optimizer = SGD(learning_rate=0.01)  # For p(y|x) parameters
+        self.q_optimizer = optimizers.get('q') or SGD(learning_rate=q_learning_rate)  # For q_mu and q_var
+        self.px_optimizer = optimizers.get('px') or SGD(learning_rate=0.01)  # For p(x) mean
+        self.py_x_optimizer = optimizers.get('py_x') or SGD(learning_rate=0.01)  # For p(y|x) parameters
+        self.q_step_size = q_learning_rate  # Step size minimize_vfe starts its line search from
     
     def calculate_complexity(self):
         """Placeholder for complexity calculation"""
@@ -28,21 +42,150 @@ class Agent(ABC):
         """Calculate the total variational free energy: complexity + accuracy"""
         return self.calculate_complexity() + self.calculate_accuracy(y)
     
+    def has_analytic_vfe_gradient(self):
+        """
+        Exact VFE gradients are available when q(x), p(x) and p(y|x) are all discrete,
+        or for diagonal Normal beliefs under a linear Normal observation model
+        """
+        if isinstance(self.qx, DiagonalNormal):
+            return isinstance(self.px, (DiagonalNormal, Normal)) and self.qx.has_analytic_accuracy(self.py_x)
+        return (isinstance(self.qx, DiscreteDistribution) and
+                isinstance(self.px, DiscreteDistribution) and
+                isinstance(self.py_x, (ConditionalDiscrete, ConditionalModalities)))
+
+    def calculate_vfe_gradient(self, y):
+        """Exact gradient of the VFE with respect to the logits of q(x), in one vectorized pass"""
+        return self.qx.kl_divergence_gradient(self.px) + self.qx.negative_expected_log_gradient(self.py_x, y)
+
+    def calculate_risk(self, o_pi_t, eps=1e-16):
+        """
+        Risk KL(o_pi_t || C) of predicted discrete observations against the preferences self.c
+        Args:
+            o_pi_t: predicted observation probabilities (..., m), or a list with one array per
+                    modality when self.c is a list of per-modality preferences (risks are summed)
+        """
+        if not isinstance(self.c, list):
+            return np.sum(o_pi_t * (np.log(o_pi_t + eps) - np.log(self.c.get_probabilities() + eps)), axis=-1)
+        return sum(np.sum(o * (np.log(o + eps) - np.log(c.get_probabilities() + eps)), axis=-1)
+                   for o, c in zip(o_pi_t, self.c))
+
     def adjust_q(self, y):
         """
         Adjust the approximate posterior q(x) to minimize VFE.
         This should update both q_mu and q_sigma.
         """
-        # Compute gradients
-        loss_fn = lambda: self.calculate_vfe(y)
-        grads_and_vars = self.q_optimizer.compute_gradients(loss_fn, self.qx)
+        # Compute gradients (exactly for discrete models, numerically otherwise)
+        if self.has_analytic_vfe_gradient():
+            grad_fn = lambda: self.calculate_vfe_gradient(y)
+            grads_and_vars = self.q_optimizer.compute_analytic_gradients(grad_fn, self.qx)
+        else:
+            loss_fn = lambda: self.calculate_vfe(y)
+            grads_and_vars = self.q_optimizer.compute_gradients(loss_fn, self.qx)
 
         # Apply gradients
         self.q_optimizer.apply_gradients(grads_and_vars)
-        
+        self.project_q()
+
+    def project_q(self):
+        """Map q(x) back onto its feasible set after an update"""
         # Ensure std stays positive for Normal distributions
         if hasattr(self.qx, 'std'):
-            self.qx.std = max(0.1, self.qx.std)
+            self.qx.std = np.maximum(0.1, self.qx.std)
+
+    def uses_line_search(self):
+        """
+        Whether minimize_vfe runs its own Armijo line search: only when q(x) is updated by plain,
+        constant-rate SGD steps, which the line search replaces with steps of a searched size
+        """
+        return type(self.q_optimizer) is SGD and not callable(self.q_optimizer.learning_rate)
+
+    def minimize_vfe(self, y, tolerance=1e-6, max_iterations=50, shrink=0.5, sufficient_decrease=1e-4, min_step_size=1e-10):
+        """
+        Minimize the VFE over q(x) by gradient descent with backtracking (Armijo) line search,
+        iterating only until it has converged instead of taking a fixed number of steps.
+        Each trial point is projected (project_q) before it is scored, and it is accepted once
+        F(new) <= F(old) + sufficient_decrease * grad·(new - old); otherwise the step shrinks.
+        The accepted step size grows by 1/shrink for the next iteration and carries over to the next call.
+        When q(x) has another update rule (a q_optimizer such as Momentum, Adam or NaturalGradient, or a
+        subclass's inference mode, see uses_line_search), adjust_q steps are repeated instead, until the
+        VFE changes by less than tolerance.
+        Args:
+            tolerance: converged once the gradient norm or the VFE decrease of a step falls below it
+            max_iterations: cap on the number of gradient steps
+            shrink: factor the step size is multiplied by on every rejected trial
+            sufficient_decrease: Armijo constant, the fraction of the predicted decrease a step must achieve
+            min_step_size: below this step size the line search gives up, q(x) is then at a (projected) minimum
+        Returns:
+            InferenceDiagnostics(iterations, vfe, converged, gradient_norm, step_size)
+        """
+        if not self.uses_line_search():
+            return self._minimize_vfe_by_adjust_q(y, tolerance, max_iterations)
+
+        if self.has_analytic_vfe_gradient():
+            compute_gradients = lambda: self.q_optimizer.compute_analytic_gradients(lambda: self.calculate_vfe_gradient(y), self.qx)
+        else:
+            compute_gradients = lambda: self.q_optimizer.compute_gradients(lambda: self.calculate_vfe(y), self.qx)
+
+        params = self.qx.parameters
+        vfe = self.calculate_vfe(y)
+        converged = False
+        iterations = 0
+        gradient_norm = np.inf
+        while iterations < max_iterations:
+            grad = compute_gradients()[0][0]
+            gradient_norm = np.linalg.norm(grad)
+            if gradient_norm < tolerance:
+                converged = True
+                break
+
+            iterations += 1
+            start = params.copy()
+            step_size = self.q_step_size
+            while True:
+                params[:] = start - step_size * grad
+                self.qx.touch()
+                self.project_q()
+                if step_size == self.q_step_size and np.max(np.abs(params - start)) < tolerance:
+                    # The projection undoes the full step: q(x) is at a minimum on the boundary of its feasible set
+                    new_vfe = np.inf
+                    break
+                new_vfe = self.calculate_vfe(y)
+                if new_vfe <= vfe + sufficient_decrease * np.dot(grad, params - start) or step_size < min_step_size:
+                    break
+                step_size *= shrink
+
+            if new_vfe > vfe:
+                # No step decreases the VFE: stay where we were
+                params[:] = start
+                self.qx.touch()
+                converged = True
+                break
+
+            decrease = vfe - new_vfe
+            vfe = new_vfe
+            if decrease < tolerance:
+                converged = True
+                break
+            self.q_step_size = step_size / shrink
+
+        return InferenceDiagnostics(iterations, vfe, converged, gradient_norm, self.q_step_size)
+
+    def _minimize_vfe_by_adjust_q(self, y, tolerance, max_iterations):
+        """Repeat the configured adjust_q update until the VFE settles (step_size is then the optimizer's rate)"""
+        vfe = self.calculate_vfe(y)
+        converged = False
+        iterations = 0
+        while iterations < max_iterations:
+            iterations += 1
+            self.adjust_q(y)
+            new_vfe = self.calculate_vfe(y)
+            change, vfe = abs(vfe - new_vfe), new_vfe
+            if change < tolerance:
+                converged = True
+                break
+
+        gradient_norm = np.linalg.norm(self.calculate_vfe_gradient(y)) if self.has_analytic_vfe_gradient() else np.nan
+        return InferenceDiagnostics(iterations, vfe, converged, gradient_norm, self.q_optimizer.current_learning_rate())
     
     def learn_px(self, y):
         """
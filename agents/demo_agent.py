@@ -1,13 +1,24 @@
-from core.distributions import Normal
+from core.distributions import Normal, DiagonalNormal
 from core.conditional_distributions import ConditionalNormal
 from core.machinas import LinearMachina as Linear, QuadraticMachina as Quadratic
 from agents.base import Agent
+import numpy as np
 
 class DemoAgent(Agent):
-    def __init__(self, machina_type='linear', obs_noise=1.0, q_learning_rate=0.1, **machina_params):
-        super().__init__(q_learning_rate)
+    def __init__(self, machina_type='linear', obs_noise=1.0, q_learning_rate=0.1, optimizers=None, latent_shape=None, **machina_params):
+        """
+        Args:
+            latent_shape: shape of a vector (or batch) of latent variables; p(x) and q(x) are then
+                          DiagonalNormals, with exact VFE gradients for 'linear' and 'matrix' machinas
+                          (obs_noise may be an array with one std per observation dimension)
+        """
+        super().__init__(q_learning_rate, optimizers)
         
         # Initialize distributions
-        self.px = Normal(mean=0.0, std=1)  # Prior over x
-        self.qx = Normal(mean=0.0, std=1)  # Approximate posterior over x
+        if latent_shape is not None:
+            self.px = DiagonalNormal(mean=np.zeros(latent_shape), std=1)  # Prior over x
+            self.qx = DiagonalNormal(mean=np.zeros(latent_shape), std=1)  # Approximate posterior over x
+        else:
+            self.px = Normal(mean=0.0, std=1)  # Prior over x
+            self.qx = Normal(mean=0.0, std=1)  # Approximate posterior over x
         self.py_x = ConditionalNormal(machina_type=machina_type, machina_params=machina_params, std=obs_noise)
\ No newline at end of file
@@ -1,81 +1,127 @@
 from core.distributions import DiscreteDistribution
-from core.conditional_distributions import ConditionalDiscrete
+from core.conditional_distributions import ConditionalDiscrete, ConditionalModalities, is_multimodal
+from core.transitions import TransitionModel
+from core.optimizers import MirrorDescent
+from core.utils import project_to_floored_simplex
 from agents.base import Agent
-from core.utils import logits2p
-from applications.maze.generative_model.mapping import state_to_index, index_to_state
+from agents.planner import TreePlanner
 import numpy as np
+from core.instrumentation import timed
 eps=1e-16
 
 class DiscreteAgent(Agent):
-    def __init__(self, px_vector, c_vector, transitioner, machina_type='matrix', q_learning_rate = 0.1, **machina_params):
-        super().__init__(q_learning_rate)
+    def __init__(self, px_vector, c_vector, transitioner, machina_type='matrix', q_learning_rate = 0.1, inference='gradient', min_prob=0.005, optimizers=None, **machina_params):
+        """
+        Args:
+            inference: 'gradient' takes one VFE gradient step per adjust_q call,
+                       'mirror' takes one exponentiated-gradient step on the simplex (core.optimizers.MirrorDescent,
+                       which also applies min_prob) per adjust_q call,
+                       'exact' jumps straight to the VFE minimiser q(x) ∝ p(x)·P(y|x)
+            min_prob: probability floor applied to q(x) after each update (None disables it)
+            optimizers: optional dict of optimizers by role ('q', 'px', 'py_x'), see Agent
+            transitioner: callable (state, action) -> next state distribution, or anything
+                          core.transitions.TransitionModel accepts (dense tensor, sparse matrices, operators)
+            c_vector, A: for several observation modalities, a list with one preference vector and one
+                         observation matrix (|O_i|, n) per modality; observations are then tuples (y_1, ..., y_M)
+        """
+        super().__init__(q_learning_rate, optimizers)
+
+        if inference not in ('gradient', 'mirror', 'exact'):
+            raise ValueError(f"Unsupported inference mode: {inference}")
+        self.inference = inference
+        self.min_prob = min_prob
+        if inference == 'mirror' and not (optimizers or {}).get('q'):
+            self.q_optimizer = MirrorDescent(learning_rate=q_learning_rate, floor=min_prob)
         
         # Initialize distributions
         self.px = DiscreteDistribution(logits=px_vector)  # Prior over x
         self.qx = DiscreteDistribution(logits=px_vector)  # Approximate posterior over x
-        self.py_x = ConditionalDiscrete(machina_type=machina_type, machina_params=machina_params)
-        self.c = DiscreteDistribution(logits=c_vector)
-        self.A = np.array(machina_params['A'])
-        self.transitioner = transitioner
+        if is_multimodal(machina_params.get('A')):
+            modality_params = [dict(machina_params, A=A) for A in machina_params['A']]
+            self.py_x = ConditionalModalities(machina_type=machina_type, machina_params=modality_params)
+            self.c = [DiscreteDistribution(logits=c) for c in c_vector]
+        else:
+            self.py_x = ConditionalDiscrete(machina_type=machina_type, machina_params=machina_params)
+            self.c = DiscreteDistribution(logits=c_vector)
+        self.transitioner = transitioner if callable(transitioner) else TransitionModel(transitioner)
+
+    @property
+    def A(self):
+        """Observation matrix of the generative model (a live view of p(y|x)'s parameters), one per modality if several"""
+        if isinstance(self.py_x, ConditionalModalities):
+            return [modality.machina.A for modality in self.py_x]
+        return self.py_x.machina.A
 
+    @timed('inference')
     def adjust_q(self, y):
-        super().adjust_q(y)
-        # Handle probability constraints for Discrete distributions
-        probs = self.qx.get_probabilities()
-        
-        # Ensure minimum probability of 1% for each action
-        min_prob = 0.005
-        n = len(probs)
-        
-        # Calculate how much probability mass we need to add to reach minimum
-        below_min = probs < min_prob
-        if np.any(below_min):
-            # Calculate total deficit
-            deficit = np.sum(min_prob - probs[below_min])
-            # Calculate how much to take from above-min probabilities
-            above_min = ~below_min
-            if np.any(above_min):
-                # Take proportionally from above-min probabilities
-                excess = probs[above_min] - min_prob
-                total_excess = np.sum(excess)
-                if total_excess > 0:
-                    # Scale down above-min probabilities to compensate
-                    probs[above_min] -= (excess * deficit / total_excess)
-                    # Set below-min probabilities to minimum
-                    probs[below_min] = min_prob
-                else:
-                    # If we can't take enough from above-min, distribute evenly
-                    probs = np.ones(n) / n
-            else:
-                # If all probabilities are below min, distribute evenly
-                probs = np.ones(n) / n
-        
-        # Convert back to logits
-        self.qx.logits = np.log(probs)
+        if self.inference == 'exact':
+            self.set_exact_posterior(y)
+            self.project_q()
+        elif self.inference == 'mirror':
+            # The update stays on the floored simplex, so no separate floor pass is needed
+            grads_and_vars = self.q_optimizer.compute_analytic_gradients(lambda: self.calculate_vfe_gradient(y), self.qx)
+            self.q_optimizer.apply_gradients(grads_and_vars)
+        else:
+            super().adjust_q(y)
 
+    def uses_line_search(self):
+        """Exact and mirror inference have their own update rules, which minimize_vfe repeats instead"""
+        return self.inference == 'gradient' and super().uses_line_search()
+
+    def project_q(self):
+        """Apply the probability floor to q(x)"""
+        if self.min_prob is not None:
+            self.apply_min_prob(self.min_prob)
+
+    def set_exact_posterior(self, y):
+        """
+        Set q(x) to the exact VFE minimiser, computed in log space:
+        ln q(x) = ln p(x) + ln P(y|x) - ln Z
+        """
+        log_q = self.px.get_log_probabilities() + self.py_x.log_likelihood(y)
+        log_q -= np.max(log_q)
+        self.qx.logits = log_q - np.log(np.sum(np.exp(log_q)))
+
+    def apply_min_prob(self, min_prob):
+        """
+        Handle probability constraints for Discrete distributions: raise every probability below
+        min_prob to it and take the mass from the others in proportion (one sort-based projection)
+        """
+        self.qx.logits = np.log(project_to_floored_simplex(self.qx.get_probabilities(), min_prob))
+
+    @timed('efe')
     def calculate_efe(self, state, pi, tau=1):    
         entropy = self.calculate_entropy() #Done in the machina. Entropy of observations for each state
         # Convert integer state to DiscreteDistribution
         s_pi_t = self._get_s_pi_t(state, pi, tau) #Ah, thats just probabilities on whats gonna happen. simple easy-peasy, transitions
         o_pi_t = self._get_o_pi_t(s_pi_t) #Thats simple. py_x(s_pi_t)
-        c_t = self.c.get_probabilities() #and thats what I want. 50/50 between "im left, reward's left" and "i'm right, reward's right"
-        zeta = np.log(o_pi_t+eps)-np.log(c_t+eps)
+        # Risk compares o_pi_t with the preferences c: 50/50 between "im left, reward's left" and "i'm right, reward's right"
 
         ambiguity = entropy @ s_pi_t
-        risk = o_pi_t @ zeta
+        risk = self.calculate_risk(o_pi_t, eps) #KL to the preferences, summed over modalities
 
         return ambiguity + risk
 
+    def plan(self, depth, precision=1.0, state=None):
+        """
+        Score every action sequence up to depth with the summed EFE
+        Returns (policies, efe, posterior), see agents.planner.TreePlanner
+        """
+        return TreePlanner(self, depth, precision=precision)(self.qx if state is None else state)
+
     def _get_s_pi_t(self, state, pi, tau):
-        for _ in range (tau):
-            state = self.transitioner(state=state, action=pi(tau))
+        for t in range(tau):
+            state = self.transitioner(state=state, action=pi(t))
 
         return state.get_probabilities()
 
     def _get_o_pi_t(self, s_pi_t):
-        return self.py_x(s_pi_t, vector_input=True).get_probabilities()
+        o_pi_t = self.py_x(s_pi_t, vector_input=True)
+        if isinstance(o_pi_t, list):
+            return [o.get_probabilities() for o in o_pi_t]  # one prediction per modality
+        return o_pi_t.get_probabilities()
 
     def calculate_entropy(self):
-        return -np.sum(self.A*np.log(self.A+eps), axis=0)
+        return self.py_x.observation_entropy(eps)
     
     
@@ -0,0 +1,136 @@
+from core.distributions import DiscreteDistribution, FactorizedDistribution
+from core.conditional_distributions import ConditionalDiscrete, ConditionalModalities, is_multimodal
+from core.transitions import TransitionModel
+from agents.base import Agent
+import numpy as np
+from core.instrumentation import timed
+eps=1e-16
+
+class FactorizedAgent(Agent):
+    def __init__(self, px_vectors, c_vector, transitioners, A, factors=None, q_learning_rate=0.1,
+                 inference='mean_field', num_iterations=16, tolerance=1e-6, optimizers=None):
+        """
+        Agent over independent state factors x = (x_1, ..., x_F) with a mean-field posterior q(x) = Π_f q_f(x_f)
+        Args:
+            px_vectors: one prior logit vector per factor
+            c_vector: preference logits over observations
+            transitioners: one transitioner per factor, each a callable (state, action) -> next state
+                           distribution or anything core.transitions.TransitionModel accepts;
+                           uncontrolled factors can use identity matrices for every action
+            A: observation tensor (m, n_f1, ..., n_fk), indexed by the factors it depends on,
+               or a list with one such tensor per observation modality (c_vector is then a list too)
+            factors: the factors f1, ..., fk of A's trailing axes (default: all, in order),
+                     or a list with the factors of each modality's tensor
+            inference: 'mean_field' iterates the factor-wise fixed point q_f ∝ p_f·exp(E_q-f[ln P(y|x)]),
+                       'gradient' takes one VFE gradient step per adjust_q call
+            num_iterations: maximum coordinate-ascent sweeps over the factors per adjust_q call
+            tolerance: stop sweeping once no logit moves by more than this
+            optimizers: optional dict of optimizers by role ('q', 'px', 'py_x'), see Agent
+        """
+        super().__init__(q_learning_rate, optimizers)
+
+        if inference not in ('mean_field', 'gradient'):
+            raise ValueError(f"Unsupported inference mode: {inference}")
+        self.inference = inference
+        self.num_iterations = num_iterations
+        self.tolerance = tolerance
+
+        # Initialize distributions
+        self.px = FactorizedDistribution(px_vectors)  # Prior over x, one factor per state variable
+        self.qx = FactorizedDistribution(px_vectors)  # Approximate posterior over x
+        if is_multimodal(A):
+            factors = factors or [None] * len(A)
+            self.py_x = ConditionalModalities(machina_type='tensor', machina_params=[{'A': A_i, 'factors': f_i} for A_i, f_i in zip(A, factors)])
+            self.c = [DiscreteDistribution(logits=c) for c in c_vector]
+        else:
+            self.py_x = ConditionalDiscrete(machina_type='tensor', machina_params={'A': A, 'factors': factors})
+            self.c = DiscreteDistribution(logits=c_vector)
+        self.transitioners = [t if callable(t) else TransitionModel(t) for t in transitioners]
+        if len(self.transitioners) != len(self.px):
+            raise ValueError("Expected one transitioner per state factor")
+
+    @property
+    def A(self):
+        """Observation tensor of the generative model (a live view of p(y|x)'s parameters), one per modality if several"""
+        if isinstance(self.py_x, ConditionalModalities):
+            return [modality.machina.A for modality in self.modalities]
+        return self.py_x.machina.A
+
+    @property
+    def modalities(self):
+        """The conditional distribution of each observation modality"""
+        return self.py_x.modalities if isinstance(self.py_x, ConditionalModalities) else [self.py_x]
+
+    @property
+    def dependencies(self):
+        """Sorted state factors that at least one modality depends on"""
+        return sorted({f for modality in self.modalities for f in modality.machina.factors})
+
+    def has_analytic_vfe_gradient(self):
+        return True
+
+    def uses_line_search(self):
+        """Mean-field inference is a fixed-point update, which minimize_vfe repeats instead"""
+        return self.inference == 'gradient' and super().uses_line_search()
+
+    @timed('inference')
+    def adjust_q(self, y):
+        if self.inference == 'mean_field':
+            self.set_mean_field_posterior(y)
+        else:
+            super().adjust_q(y)
+
+    def set_mean_field_posterior(self, y):
+        """
+        Coordinate ascent on the VFE, one factor at a time, in log space:
+        ln q_f(x_f) = ln p_f(x_f) + E_q-f[ln P(y|x)] - ln Z_f
+        Factors the observation does not depend on get no message and stay at their prior
+        """
+        dependencies = self.dependencies
+
+        for f in range(len(self.qx)):
+            if f not in dependencies:
+                self.qx.factors[f].logits = self.px.factors[f].get_log_probabilities()
+
+        for _ in range(self.num_iterations):
+            previous = self.qx.parameters.copy()
+            for f in dependencies:
+                log_q = self.px.factors[f].get_log_probabilities() + self.qx.message(self.py_x, y, f)
+                log_q -= np.max(log_q)
+                self.qx.factors[f].logits = log_q - np.log(np.sum(np.exp(log_q)))
+            # A single factor is exact after one pass
+            if len(dependencies) <= 1 or np.max(np.abs(self.qx.parameters - previous)) < self.tolerance:
+                break
+
+    @timed('efe')
+    def calculate_efe(self, state, pi, tau=1):
+        """
+        Expected free energy of policy pi after tau steps, computed factor by factor:
+        the predicted observation and ambiguity contract A and its entropy with each factor's prediction,
+        and both terms are summed over the observation modalities
+        """
+        s_pi_t = self._get_s_pi_t(state, pi, tau)
+        o_pi_t = self._get_o_pi_t(s_pi_t)
+
+        s_pi_t = FactorizedDistribution.from_probabilities(s_pi_t)
+        ambiguity = sum(s_pi_t.expectation(modality.observation_entropy(eps), modality.machina.factors)
+                        for modality in self.modalities)
+        risk = self.calculate_risk(o_pi_t, eps)
+
+        return ambiguity + risk
+
+    def _get_s_pi_t(self, state, pi, tau):
+        """Per-factor predicted state probabilities after applying pi(0), ..., pi(tau - 1)"""
+        factors = list(state.factors)
+        for t in range(tau):
+            factors = [transitioner(state=factor, action=pi(t)) for transitioner, factor in zip(self.transitioners, factors)]
+
+        return [factor.get_probabilities() for factor in factors]
+
+    def _get_o_pi_t(self, s_pi_t):
+        o_pi_t = [modality.machina(s_pi_t, vector_input=True) for modality in self.modalities]
+        return o_pi_t if isinstance(self.py_x, ConditionalModalities) else o_pi_t[0]
+
+    def calculate_entropy(self):
+        """Observation entropy for every combination of the factors A depends on, one tensor per modality"""
+        return [modality.observation_entropy(eps) for modality in self.modalities]
@@ -0,0 +1,70 @@
+import itertools
+import numpy as np
+from core.distributions import BatchedDiscreteDistribution
+from core.instrumentation import timed
+eps = 1e-16
+
+def enumerate_policies(depth, num_actions=4):
+    """
+    All action sequences of length depth, in trie (lexicographic) order.
+    Row k is the policy whose EFE is efe[k]; policies sharing a prefix are contiguous.
+    """
+    return np.array(list(itertools.product(range(num_actions), repeat=depth)), dtype=int).reshape(-1, depth)
+
+class TreePlanner:
+    def __init__(self, agent, depth, num_actions=4, precision=1.0):
+        """
+        Exhaustive depth-T planner that scores every action sequence by its summed EFE
+        Args:
+            agent: DiscreteAgent providing transitioner, _get_o_pi_t(), calculate_risk() and calculate_entropy()
+            depth: planning horizon T
+            num_actions: number of one-hot actions the transitioner accepts
+            precision: inverse temperature of the policy posterior softmax(-precision * G)
+        """
+        self.agent = agent
+        self.depth = depth
+        self.num_actions = num_actions
+        self.precision = precision
+        self.policies = enumerate_policies(depth, num_actions)
+        self._actions = np.eye(num_actions)
+
+    def _propagate(self, state_probs, action):
+        """Next-state probabilities of a (B, n) batch of beliefs under one one-hot action"""
+        transitioner = self.agent.transitioner
+        if hasattr(transitioner, 'propagate'):
+            return transitioner.propagate(state_probs, action)
+        # Plain callables take and return distributions
+        return transitioner(state=BatchedDiscreteDistribution.from_probabilities(state_probs), action=action).get_probabilities()
+
+    @timed('planning')
+    def __call__(self, state):
+        """
+        Expand the policy trie level by level from the belief state.
+        Each prefix is propagated once per action and shared by all of its descendants, so the
+        number of state predictions is A + A^2 + ... + A^T ≈ A^T·A/(A-1) rather than T·A^T.
+        Returns:
+            policies: (A^T, T) action indices
+            efe: (A^T,) expected free energy summed over the horizon
+            posterior: (A^T,) softmax(-precision * efe)
+        """
+        entropy = self.agent.calculate_entropy()
+
+        frontier = state.get_probabilities()[None, :]
+        G = np.zeros(1)
+        for _ in range(self.depth):
+            # Child p*A + a extends prefix p with action a: one batched transition per action,
+            # stacked along axis 1 so that row p*A + a of the flattened result is that child
+            s_pi_t = np.stack([self._propagate(frontier, action) for action in self._actions], axis=1)
+            s_pi_t = s_pi_t.reshape(-1, frontier.shape[-1])
+            o_pi_t = self.agent._get_o_pi_t(s_pi_t)
+
+            ambiguity = s_pi_t @ entropy
+            risk = self.agent.calculate_risk(o_pi_t, eps)
+            G = np.repeat(G, self.num_actions) + ambiguity + risk
+
+            frontier = s_pi_t
+
+        logits = -self.precision * G
+        posterior = np.exp(logits - np.max(logits))
+        posterior /= np.sum(posterior)
+        return self.policies, G, posterior
@@ -1,35 +1,38 @@
 import pygame
-import random
-import time
+from collections import OrderedDict
 import numpy as np
-from core.distributions import DiscreteDistribution
-from applications.maze.generative_model.mapping import state_to_index, index_to_state, get_observation_idx, NUM_PLAYER_OBS, NUM_STIMULI
+from applications.maze.generative_model.mapping import state_to_index, get_observation_idx
 eps = 1e-16
 
+BACKGROUND = (200, 200, 200)  # Same gray as the maze background, used to erase changed items
+TEXT_CACHE_SIZE = 512  # Rendered text surfaces kept in the LRU cache
+
 class DisplayManager:
     def __init__(self):
         self.font = pygame.font.Font(None, 29)
+        self.small_font = pygame.font.Font(None, 22)  # Right panel tables
+        self.label_font = pygame.font.Font(None, 20)  # "Move i" labels in alternative mode
         self.player_positions = ["Top Left", "Top Mid", "Top Right", "Center", "Center Down"]
         self.reward_positions = ["Left", "Right"]
         self.stimulus_types = ["Positive", "Neutral", "Negative"]
         self.WINDOW_WIDTH = 1300
         self.current_policy = 0  # 0: up, 1: down, 2: left, 3: right
         self.display_mode = "standard"  # Current display mode for right panel
-        
+
         # Sequence of moves for alternative mode
         self.move_sequence = [0, 0, 0, 0]  # Initial sequence: all "Up"
         self.action_names = ["Up", "Down", "Left", "Right"]
-        
+
         # Define button dimensions and positions
         self.button_width = 80
         self.button_height = 30
         self.button_margin = 10
         self.button_y = 10
-        
+
         # Calculate button positions - right-aligned
         total_width = 5 * self.button_width + 4 * self.button_margin  # Back to 5 buttons
         start_x = self.WINDOW_WIDTH - total_width - 10  # 10px margin from right edge
-        
+
         self.button_x_positions = [
             start_x,  # First button
             start_x + self.button_width + self.button_margin,  # Second button
@@ -37,64 +40,49 @@ class DisplayManager:
             start_x + 3 * (self.button_width + self.button_margin),   # Fourth button
             start_x + 4 * (self.button_width + self.button_margin)    # Mode switch button
         ]
-    
-    def _get_text_surface(self, text, color=(0, 0, 0)):
-        """Get a cached text surface or create a new one"""
-        return self.font.render(text, True, color)
-    
+
+        # Rendered text surfaces keyed by (font, text, color), least recently used first
+        self._text_cache = OrderedDict()
+        # What is on screen: item key -> (content, rect); only items whose content changes are redrawn
+        self._drawn = {}
+        self._screen = None
+        # Table values and the (belief, observation, policy) they were computed for
+        self._values = None
+        self._values_key = None
+
+    def _get_text_surface(self, text, color=(0, 0, 0), font=None):
+        """Get a cached text surface or create a new one (LRU cache keyed by font, text and color)"""
+        font = font or self.font
+        key = (id(font), text, color)
+        surface = self._text_cache.get(key)
+        if surface is not None:
+            self._text_cache.move_to_end(key)
+            return surface
+
+        surface = font.render(text, True, color)
+        self._text_cache[key] = surface
+        if len(self._text_cache) > TEXT_CACHE_SIZE:
+            self._text_cache.popitem(last=False)
+        return surface
+
     def _draw_button(self, screen, text, x, y, width, height, is_selected=False):
         """Draw a button and return its rect"""
         # Draw button background
         color = (200, 200, 200) if is_selected else (150, 150, 150)
         pygame.draw.rect(screen, color, (x, y, width, height))
         pygame.draw.rect(screen, (0, 0, 0), (x, y, width, height), 2)  # Border
-        
+
         # Draw button text
         text_surface = self._get_text_surface(text)
         text_rect = text_surface.get_rect(center=(x + width/2, y + height/2))
         screen.blit(text_surface, text_rect)
-        
+
         return pygame.Rect(x, y, width, height)
-    
-    def _draw_table_header(self, screen, title, y_offset, is_observation=False):
-        """Draw a table header and return the new y_offset"""
-        text_surface = self._get_text_surface(title)
-        screen.blit(text_surface, (10, y_offset))
-        y_offset += 30
-        
-        # Draw column headers
-        if is_observation:
-            # For observation tables, show stimulus types
-            for col, stimulus in enumerate(self.stimulus_types):
-                text_surface = self._get_text_surface(stimulus)
-                screen.blit(text_surface, (200 + col * 100, y_offset))
-        else:
-            # For state tables, show reward positions
-            for col, reward in enumerate(self.reward_positions):
-                text_surface = self._get_text_surface(reward)
-                screen.blit(text_surface, (200 + col * 100, y_offset))
-        
-        return y_offset + 30
-    
-    def _draw_table_row(self, screen, row_text, values, y_offset, colors=None):
-        """Draw a table row and return the new y_offset"""
-        # Draw row header
-        text_surface = self._get_text_surface(row_text)
-        screen.blit(text_surface, (10, y_offset))
-        
-        # Draw values
-        for col, value in enumerate(values):
-            color = colors[col] if colors else (0, 0, 0)
-            text = f"{value:.2f}"
-            text_surface = self._get_text_surface(text, color)
-            screen.blit(text_surface, (200 + col * 100, y_offset))
-        
-        return y_offset + 30
 
     def handle_click(self, pos):
         """Handle mouse click on policy buttons"""
         x, y = pos
-        
+
         for i, button_x in enumerate(self.button_x_positions):
             button_rect = pygame.Rect(button_x, self.button_y, self.button_width, self.button_height)
             if button_rect.collidepoint(x, y):
@@ -110,358 +98,218 @@ class DisplayManager:
                 return True
         return False
 
-    def _draw_standard_policy_buttons(self, screen, action_names):
-        """Draw the standard policy buttons"""
-        for i, name in enumerate(action_names):
-            button_rect = self._draw_button(screen, name, 
-                            self.button_x_positions[i], 
-                            self.button_y,
-                            self.button_width, 
-                            self.button_height,
-                            is_selected=(i == self.current_policy))
-            
-            # Draw button border for debugging
-            pygame.draw.rect(screen, (255, 0, 0), button_rect, 1)
-
-    def _draw_alternative_policy_buttons(self, screen, action_names):
-        """Draw the alternative policy buttons showing move sequence"""
-        # Draw sequence number labels
-        small_font = pygame.font.Font(None, 20)
-        for i in range(4):
-            # Draw sequence number above button
-            text = f"Move {i+1}"
-            text_surface = small_font.render(text, True, (0, 0, 0))
-            text_rect = text_surface.get_rect(center=(self.button_x_positions[i] + self.button_width/2, 
-                                                     self.button_y - 15))
-            screen.blit(text_surface, text_rect)
-            
-            # Draw the button with current move
-            current_move = self.move_sequence[i]
-            button_rect = self._draw_button(screen, 
-                            self.action_names[current_move],
-                            self.button_x_positions[i], 
-                            self.button_y,
-                            self.button_width, 
-                            self.button_height,
-                            is_selected=True)  # Always selected to show it's active
-            
-            # Draw button border
-            pygame.draw.rect(screen, (0, 255, 0), button_rect, 1)
-
-    def _draw_standard_tables(self, screen, efe_values, s_pi_t_values, entropy_values, o_pi_t_values, zeta_values, action_names):
-        """Draw the standard tables layout"""
-        # Use a smaller font for the right panel
-        small_font = pygame.font.Font(None, 22)
-        def get_small_text_surface(text, color=(0, 0, 0)):
-            return small_font.render(text, True, color)
-        
-        # Draw EFE table below buttons (right-aligned)
-        efe_x_offset = self.button_x_positions[0]
-        label_col_width = 100
-        col_width = 60
-        row_height = 22
-        y_offset = self.button_y + self.button_height + 10
-        text_surface = get_small_text_surface(f"Expected Free Energy (EFE) - Policy: {action_names[self.current_policy]}")
-        screen.blit(text_surface, (efe_x_offset, y_offset))
-        y_offset += row_height
-        
-        # Draw current policy EFE value
-        text = f"{efe_values[0]:.2f}"
-        text_surface = get_small_text_surface(text)
-        screen.blit(text_surface, (efe_x_offset + label_col_width + col_width * 2, y_offset))
-        y_offset += row_height
-        
-        # Helper to draw a 2x5 table for state-based values (s_pi_t and entropy)
-        def draw_state_table(title, values, y_offset):
-            # Draw header
-            text_surface = get_small_text_surface(title)
-            screen.blit(text_surface, (efe_x_offset, y_offset))
-            y_offset += row_height
-            
-            # Draw column headers for reward positions
-            for col, reward in enumerate(self.reward_positions):
-                text_surface = get_small_text_surface(reward)
-                screen.blit(text_surface, (efe_x_offset + label_col_width + col * col_width, y_offset))
-            y_offset += row_height
-            
-            # Draw rows for each player position
-            for row, player in enumerate(self.player_positions):
-                text_surface = get_small_text_surface(player)
-                screen.blit(text_surface, (efe_x_offset, y_offset))
-                
-                # Get values for this row using state mapping
-                row_values = []
-                for col in range(2):
-                    state_idx = state_to_index(row, col)
-                    row_values.append(values[state_idx])
-                
-                # Draw values
-                for col, value in enumerate(row_values):
-                    text = f"{value:.2f}"
-                    text_surface = get_small_text_surface(text)
-                    screen.blit(text_surface, (efe_x_offset + label_col_width + col * col_width, y_offset))
-                y_offset += row_height
-            
-            return y_offset + 5
-
-        # Helper to draw a 3x6 table for observation-based values (o_pi_t and zeta)
-        def draw_observation_table(title, values, y_offset):
-            # Draw header
-            text_surface = get_small_text_surface(title)
-            screen.blit(text_surface, (efe_x_offset, y_offset))
-            y_offset += row_height
-            
-            # Draw column headers for stimulus types
-            for col, stimulus in enumerate(self.stimulus_types):
-                text_surface = get_small_text_surface(stimulus)
-                screen.blit(text_surface, (efe_x_offset + label_col_width + col * col_width, y_offset))
-            y_offset += row_height
-            
-            # Draw rows for each player position plus CD (Right)
-            for row, player in enumerate(self.player_positions + ["CD (Right)"]):
-                text_surface = get_small_text_surface(player)
-                screen.blit(text_surface, (efe_x_offset, y_offset))
-                
-                # Get values for this row using observation mapping
-                row_values = []
-                for col in range(NUM_STIMULI):
-                    obs_idx = get_observation_idx(row, col)
-                    row_values.append(values[obs_idx])
-                
-                # Draw values
-                for col, value in enumerate(row_values):
-                    text = f"{value:.2f}"
-                    text_surface = get_small_text_surface(text)
-                    screen.blit(text_surface, (efe_x_offset + label_col_width + col * col_width, y_offset))
-                y_offset += row_height
-            
-            return y_offset + 5
-        
-        # Draw s_pi_t, entropy, o_pi_t, zeta as tables (right-aligned, compact)
-        y_offset = draw_state_table("s_pi_t", s_pi_t_values[0], y_offset)
-        y_offset = draw_state_table("entropy", entropy_values[0], y_offset)
-        y_offset = draw_observation_table("o_pi_t", o_pi_t_values[0], y_offset)
-        y_offset = draw_observation_table("zeta", zeta_values[0], y_offset)
-
-    def _draw_alternative_tables(self, screen, efe_values, s_pi_t_values, entropy_values, o_pi_t_values, zeta_values, action_names):
-        """Draw the alternative tables layout"""
-        # Use a smaller font for the right panel
-        small_font = pygame.font.Font(None, 22)
-        def get_small_text_surface(text, color=(0, 0, 0)):
-            return small_font.render(text, True, color)
-        
-        # Draw EFE table below buttons (right-aligned)
-        efe_x_offset = self.button_x_positions[0]
-        label_col_width = 100
-        col_width = 60
-        row_height = 22
-        y_offset = self.button_y + self.button_height + 10
-        
-        # Draw header with alternative style
-        move_sequence_str = " -> ".join([self.action_names[move] for move in self.move_sequence])
-        text_surface = get_small_text_surface(f"Alternative EFE - Sequence: {move_sequence_str}")
-        screen.blit(text_surface, (efe_x_offset, y_offset))
-        y_offset += row_height
-        
-        # Draw EFE value
-        text = f"{efe_values[0]:.2f}"
-        text_surface = get_small_text_surface(text)
-        screen.blit(text_surface, (efe_x_offset + label_col_width + col_width * 2, y_offset))
-        y_offset += row_height
-        
-        # Helper to draw a 2x5 table for state-based values (s_pi_t and entropy)
-        def draw_state_table(title, values, y_offset):
-            # Draw header
-            text_surface = get_small_text_surface(title)
-            screen.blit(text_surface, (efe_x_offset, y_offset))
-            y_offset += row_height
-            
-            # Draw column headers for reward positions
-            for col, reward in enumerate(self.reward_positions):
-                text_surface = get_small_text_surface(reward)
-                screen.blit(text_surface, (efe_x_offset + label_col_width + col * col_width, y_offset))
-            y_offset += row_height
-            
-            # Draw rows for each player position with actual values
-            for row, player in enumerate(self.player_positions):
-                text_surface = get_small_text_surface(player)
-                screen.blit(text_surface, (efe_x_offset, y_offset))
-                
-                # Get values for this row using state mapping
-                row_values = []
-                for col in range(2):
-                    state_idx = state_to_index(row, col)
-                    row_values.append(values[state_idx])
-                
-                # Draw values
-                for col, value in enumerate(row_values):
-                    text = f"{value:.2f}"
-                    text_surface = get_small_text_surface(text)
-                    screen.blit(text_surface, (efe_x_offset + label_col_width + col * col_width, y_offset))
-                y_offset += row_height
-            
-            return y_offset + 5
-
-        # Helper to draw a 3x6 table for observation-based values (o_pi_t and zeta)
-        def draw_observation_table(title, values, y_offset):
-            # Draw header
-            text_surface = get_small_text_surface(title)
-            screen.blit(text_surface, (efe_x_offset, y_offset))
-            y_offset += row_height
-            
-            # Draw column headers for stimulus types
-            for col, stimulus in enumerate(self.stimulus_types):
-                text_surface = get_small_text_surface(stimulus)
-                screen.blit(text_surface, (efe_x_offset + label_col_width + col * col_width, y_offset))
-            y_offset += row_height
-            
-            # Draw rows for each player position plus CD (Right) with actual values
-            for row, player in enumerate(self.player_positions + ["CD (Right)"]):
-                text_surface = get_small_text_surface(player)
-                screen.blit(text_surface, (efe_x_offset, y_offset))
-                
-                # Get values for this row using observation mapping
-                row_values = []
-                for col in range(NUM_STIMULI):
-                    obs_idx = get_observation_idx(row, col)
-                    row_values.append(values[obs_idx])
-                
-                # Draw values
-                for col, value in enumerate(row_values):
-                    text = f"{value:.2f}"
-                    text_surface = get_small_text_surface(text)
-                    screen.blit(text_surface, (efe_x_offset + label_col_width + col * col_width, y_offset))
-                y_offset += row_height
-            
-            return y_offset + 5
-        
-        # Draw s_pi_t, entropy, o_pi_t, zeta as tables (right-aligned, compact)
-        y_offset = draw_state_table("s_pi_t (Alt)", s_pi_t_values[0], y_offset)
-        y_offset = draw_state_table("entropy (Alt)", entropy_values[0], y_offset)
-        y_offset = draw_observation_table("o_pi_t (Alt)", o_pi_t_values[0], y_offset)
-        y_offset = draw_observation_table("zeta (Alt)", zeta_values[0], y_offset)
-
-    def display_qx_text(self, world, agent, qx_differences):
-        """Display the Q(x) distribution"""
-        screen = world._environment.get_display()
-        
-        # Get current observation
-        y = world.observe()
-        
-        # Get current state from agent's q(x) distribution
-        current_state = np.argmax(agent.qx.get_probabilities())
-        
-        # Calculate probability vectors
-        qx_vector = [float(round(agent.qx.probability(x), 2)) for x in range(10)]
-        px_vector = [float(round(agent.px.probability(x), 2)) for x in range(10)]
-        py_x_vector = [float(round(agent.py_x(x).probability(y), 2)) for x in range(10)]
-        
-        # Calculate EFE for each action
-        efe_values = []
-        s_pi_t_values = []
-        entropy_values = []
-        o_pi_t_values = []
-        zeta_values = []
-        
-        # Calculate components for current policy only
+    def invalidate(self):
+        """Forget what is on screen, so the next frame redraws every item"""
+        self._drawn = {}
+
+    # Items: every piece of text or button is an item with a stable key. A frame lists
+    # the content of all items; only items whose content differs from what is on
+    # screen are erased and redrawn, and their rects are returned as dirty.
+
+    def _text(self, items, key, text, pos, color=(0, 0, 0), font=None, centered=False):
+        items[key] = ('text', text, color, font or self.font, pos, centered)
+
+    def _button(self, items, key, text, x, is_selected, border=None):
+        items[key] = ('button', text, x, is_selected, border)
+
+    def _draw_item(self, screen, content):
+        """Draw one item and return its rect"""
+        if content[0] == 'text':
+            _, text, color, font, pos, centered = content
+            surface = self._get_text_surface(text, color, font)
+            rect = surface.get_rect(center=pos) if centered else surface.get_rect(topleft=pos)
+            screen.blit(surface, rect)
+            return rect
+
+        _, text, x, is_selected, border = content
+        rect = self._draw_button(screen, text, x, self.button_y, self.button_width, self.button_height, is_selected=is_selected)
+        if border is not None:
+            pygame.draw.rect(screen, border, rect, 1)
+        return rect
+
+    def _update_items(self, screen, items):
+        """Redraw the items whose content changed and erase the ones that are gone; returns the dirty rects"""
+        dirty = []
+        # Erase everything stale first, so a redrawn item is never painted over by a neighbour's erase
+        for key, (content, rect) in list(self._drawn.items()):
+            if items.get(key) != content:
+                screen.fill(BACKGROUND, rect)
+                dirty.append(rect)
+                del self._drawn[key]
+
+        for key, content in items.items():
+            if key not in self._drawn:
+                rect = self._draw_item(screen, content)
+                self._drawn[key] = (content, rect)
+                dirty.append(rect)
+        return dirty
+
+    def _policy(self):
+        """The policy and horizon shown in the right panel"""
         if self.display_mode == "standard":
             # Standard mode: single action
             action = np.zeros(4)
             action[self.current_policy] = 1
-            pi = lambda tau: action
-            tau = 1  # Use tau=1 for standard mode
-        else:
-            # Alternative mode: sequence of actions
-            def sequence_pi(tau):
-                if tau >= len(self.move_sequence):
-                    return np.zeros(4)  # Return no action if beyond sequence
-                action = np.zeros(4)
-                action[self.move_sequence[tau]] = 1
-                return action
-            pi = sequence_pi
-            tau = 4  # Use tau=4 for alternative mode
-        
+            return (lambda tau: action), 1  # Use tau=1 for standard mode
+
+        # Alternative mode: sequence of actions
+        def sequence_pi(tau):
+            if tau >= len(self.move_sequence):
+                return np.zeros(4)  # Return no action if beyond sequence
+            action = np.zeros(4)
+            action[self.move_sequence[tau]] = 1
+            return action
+        return sequence_pi, 4  # Use tau=4 for alternative mode
+
+    def _compute_values(self, agent, y):
+        """Everything the tables show, from the agent's current beliefs (vectorized, no per-cell softmax)"""
+        pi, tau = self._policy()
+
         # Calculate components using agent's q(x) directly
         s_pi_t = agent._get_s_pi_t(state=agent.qx, pi=pi, tau=tau)
         o_pi_t = agent._get_o_pi_t(s_pi_t)
         entropy = agent.calculate_entropy()
-        c_t = agent.c.get_probabilities()
+        if isinstance(o_pi_t, list):
+            # Joint (player, stimulus) tables from the per-modality predictions, in get_observation_idx order
+            o_pi_t = np.multiply.outer(o_pi_t[1], o_pi_t[0]).ravel()
+            c_t = np.multiply.outer(agent.c[1].get_probabilities(), agent.c[0].get_probabilities()).ravel()
+        else:
+            c_t = agent.c.get_probabilities()
         zeta = np.log(o_pi_t+eps)-np.log(c_t+eps)
-        
-        # Store values
-        efe = agent.calculate_efe(state=agent.qx, pi=pi, tau=tau)
-        efe_values.append(float(round(efe, 2)))
-        s_pi_t_values.append(s_pi_t)
-        entropy_values.append(entropy)
-        o_pi_t_values.append(o_pi_t)
-        zeta_values.append(zeta)
-        
-        # Clear the right side of the screen
-        pygame.draw.rect(screen, (200, 200, 200), (self.button_x_positions[0] - 10, 0, 
-                                                  self.WINDOW_WIDTH - self.button_x_positions[0] + 20, 
-                                                  self.WINDOW_WIDTH))
-        
-        # Draw mode switch button
+
+        return {
+            'qx': agent.qx.get_probabilities(),
+            'px': agent.px.get_probabilities(),
+            'py_x': np.exp(agent.py_x.log_likelihood(y)),
+            'efe': agent.calculate_efe(state=agent.qx, pi=pi, tau=tau),
+            's_pi_t': s_pi_t, 'entropy': entropy, 'o_pi_t': o_pi_t, 'zeta': zeta,
+        }
+
+    def _button_items(self, items):
+        # Mode switch button
         mode_text = "Alt" if self.display_mode == "standard" else "Std"
-        self._draw_button(screen, mode_text,
-                        self.button_x_positions[4],
-                        self.button_y,
-                        self.button_width,
-                        self.button_height,
-                        is_selected=self.display_mode == "alternative")
-        
-        # Show appropriate panel based on mode
-        action_names = ["Up", "Down", "Left", "Right"]
-        
-        if self.display_mode == "standard":
-            # Draw standard policy buttons and tables
-            self._draw_standard_policy_buttons(screen, action_names)
-            self._draw_standard_tables(screen, efe_values, s_pi_t_values, entropy_values, o_pi_t_values, zeta_values, action_names)
-        else:
-            # Draw alternative policy buttons and tables
-            self._draw_alternative_policy_buttons(screen, action_names)
-            self._draw_alternative_tables(screen, efe_values, s_pi_t_values, entropy_values, o_pi_t_values, zeta_values, action_names)
-        
-        # Reset y_offset for other tables
-        y_offset = 10
-        
-        # Draw Q(x) table
-        y_offset = self._draw_table_header(screen, "Q(x) Distribution", y_offset)
-        for position, player in enumerate(self.player_positions):
-            row_values = []
-            row_colors = []
-            for reward in range(2):
-                state_idx = state_to_index(position, reward)
-                row_values.append(qx_vector[state_idx])
-                diff = qx_differences[state_idx]
-                if diff > 0:
-                    color = (0, 255, 0)
-                elif diff < 0:
-                    color = (255, 0, 0)
-                else:
-                    color = (0, 0, 0)
-                row_colors.append(color)
-            y_offset = self._draw_table_row(screen, player, row_values, y_offset, colors=row_colors)
-        
-        # Draw P(x) table
-        y_offset += 10
-        y_offset = self._draw_table_header(screen, "P(x) Distribution", y_offset)
-        for position, player in enumerate(self.player_positions):
-            row_values = []
-            for reward in range(2):
-                state_idx = state_to_index(position, reward)
-                row_values.append(px_vector[state_idx])
-            y_offset = self._draw_table_row(screen, player, row_values, y_offset)
-        
-        # Draw P(y|x) table
-        y_offset += 10
-        y_offset = self._draw_table_header(screen, f"P(y={y}|x) Distribution", y_offset)
+        self._button(items, 'mode', mode_text, self.button_x_positions[4], is_selected=self.display_mode == "alternative")
+
+        for i in range(4):
+            if self.display_mode == "standard":
+                # Policy buttons, with a red border for debugging
+                self._button(items, ('policy', i), self.action_names[i], self.button_x_positions[i],
+                             is_selected=(i == self.current_policy), border=(255, 0, 0))
+            else:
+                # Sequence number above each button, which shows (and cycles) that move
+                self._text(items, ('move', i), f"Move {i+1}",
+                           (self.button_x_positions[i] + self.button_width/2, self.button_y - 15),
+                           font=self.label_font, centered=True)
+                self._button(items, ('policy', i), self.action_names[self.move_sequence[i]], self.button_x_positions[i],
+                             is_selected=True, border=(0, 255, 0))
+
+    def _panel_table_items(self, items, name, title, values, y_offset, observation=False):
+        """
+        Items of a right panel table: a 2x5 state table (s_pi_t, entropy) or a
+        3x6 observation table (o_pi_t, zeta); returns the new y_offset
+        """
+        x = self.button_x_positions[0]
+        label_col_width = 100
+        col_width = 60
+        row_height = 22
+
+        self._text(items, (name, 'title'), title, (x, y_offset), font=self.small_font)
+        y_offset += row_height
+
+        # Column headers: stimulus types or reward positions
+        columns = self.stimulus_types if observation else self.reward_positions
+        for col, label in enumerate(columns):
+            self._text(items, (name, 'column', col), label, (x + label_col_width + col * col_width, y_offset), font=self.small_font)
+        y_offset += row_height
+
+        # One row per player position (plus CD (Right) for observations)
+        rows = self.player_positions + ["CD (Right)"] if observation else self.player_positions
+        for row, label in enumerate(rows):
+            self._text(items, (name, 'row', row), label, (x, y_offset), font=self.small_font)
+            for col in range(len(columns)):
+                index = get_observation_idx(row, col) if observation else state_to_index(row, col)
+                self._text(items, (name, row, col), f"{values[index]:.2f}",
+                           (x + label_col_width + col * col_width, y_offset), font=self.small_font)
+            y_offset += row_height
+
+        return y_offset + 5
+
+    def _state_table_items(self, items, name, title, values, y_offset, colors=None):
+        """Items of a left panel 2x5 state table (Q(x), P(x), P(y|x)); returns the new y_offset"""
+        self._text(items, (name, 'title'), title, (10, y_offset))
+        y_offset += 30
+
+        # Column headers for reward positions
+        for col, reward in enumerate(self.reward_positions):
+            self._text(items, (name, 'column', col), reward, (200 + col * 100, y_offset))
+        y_offset += 30
+
         for position, player in enumerate(self.player_positions):
-            row_values = []
+            self._text(items, (name, 'row', position), player, (10, y_offset))
             for reward in range(2):
                 state_idx = state_to_index(position, reward)
-                row_values.append(py_x_vector[state_idx])
-            y_offset = self._draw_table_row(screen, player, row_values, y_offset)
+                color = colors[state_idx] if colors is not None else (0, 0, 0)
+                self._text(items, (name, position, reward), f"{values[state_idx]:.2f}", (200 + reward * 100, y_offset), color)
+            y_offset += 30
+
+        return y_offset
+
+    def display_qx_text(self, world, agent, qx_differences, redraw=False, y=None, plan=None):
+        """
+        Display the Q(x) distribution, the prior, the likelihood and the EFE panel.
+        Values are only recomputed when the beliefs, the observation or the selected
+        policy change, and only the items whose text changed are redrawn.
+        Args:
+            y: observation the agent's beliefs were inferred from (default: the world's current one)
+            plan: action indices of the agent's best policy, shown below the tables if given
+        Returns the dirty rects to pass to pygame.display.update
+        """
+        screen = world._environment.get_display()
+        if redraw or screen is not self._screen:
+            self._screen = screen
+            self.invalidate()
+
+        # Get current observation
+        if y is None:
+            y = world.observe()
+
+        key = (agent.qx.version, agent.px.version, agent.py_x.version, y,
+               self.display_mode, self.current_policy, tuple(self.move_sequence))
+        if key != self._values_key:
+            self._values = self._compute_values(agent, y)
+            self._values_key = key
+        values = self._values
+
+        items = {}
+        self._button_items(items)
+
+        # Right panel: EFE of the current policy and its components
+        x = self.button_x_positions[0]
+        y_offset = self.button_y + self.button_height + 10
+        if self.display_mode == "standard":
+            header, suffix = f"Expected Free Energy (EFE) - Policy: {self.action_names[self.current_policy]}", ""
+        else:
+            move_sequence_str = " -> ".join([self.action_names[move] for move in self.move_sequence])
+            header, suffix = f"Alternative EFE - Sequence: {move_sequence_str}", " (Alt)"
+        self._text(items, 'efe_header', header, (x, y_offset), font=self.small_font)
+        y_offset += 22
+        self._text(items, 'efe_value', f"{values['efe']:.2f}", (x + 100 + 60 * 2, y_offset), font=self.small_font)
+        y_offset += 22
+
+        y_offset = self._panel_table_items(items, 's_pi_t', "s_pi_t" + suffix, values['s_pi_t'], y_offset)
+        y_offset = self._panel_table_items(items, 'entropy', "entropy" + suffix, values['entropy'], y_offset)
+        y_offset = self._panel_table_items(items, 'o_pi_t', "o_pi_t" + suffix, values['o_pi_t'], y_offset, observation=True)
+        y_offset = self._panel_table_items(items, 'zeta', "zeta" + suffix, values['zeta'], y_offset, observation=True)
+
+        # Left panel: Q(x) colored by its change since the last update, P(x) and P(y|x)
+        qx_colors = [(0, 255, 0) if diff > 0 else (255, 0, 0) if diff < 0 else (0, 0, 0) for diff in qx_differences]
+        y_offset = self._state_table_items(items, 'qx', "Q(x) Distribution", values['qx'], 10, colors=qx_colors)
+        y_offset = self._state_table_items(items, 'px', "P(x) Distribution", values['px'], y_offset + 10)
+        y_offset = self._state_table_items(items, 'py_x', f"P(y={y}|x) Distribution", values['py_x'], y_offset + 10)
+        if plan is not None:
+            self._text(items, 'plan', "Plan: " + " -> ".join(self.action_names[action] for action in plan), (10, y_offset + 10))
+
+        return self._update_items(screen, items)
 
 # Create a singleton instance
 _display_manager = None
@@ -473,7 +321,7 @@ def get_display_manager():
         _display_manager = DisplayManager()
     return _display_manager
 
-def display_qx_text(world, agent, qx_differences):
-    """Wrapper function to use the display manager"""
+def display_qx_text(world, agent, qx_differences, redraw=False, y=None, plan=None):
+    """Wrapper function to use the display manager, returns the dirty rects"""
     display_manager = get_display_manager()
-    display_manager.display_qx_text(world, agent, qx_differences) 
\ No newline at end of file
+    return display_manager.display_qx_text(world, agent, qx_differences, redraw=redraw, y=y, plan=plan)
@@ -1,12 +1,13 @@
 import pygame
 import sys
-import random
-import numpy as np
-from core.distributions import DiscreteDistribution
-from applications.maze.generative_model.mapping import state_to_index
+from applications.maze.simulation import MazeSimulation
 
-class MazeGame:
-    def __init__(self):
+class MazeGame(MazeSimulation):
+    def __init__(self, seed=None):
+        """
+        Pygame view of the T-maze: the dynamics come from MazeSimulation, driven by
+        the wall clock so that the 150 ms move cooldown paces keyboard input
+        """
         # Initialize Pygame
         pygame.init()
         
@@ -43,27 +44,17 @@ class MazeGame:
         
         # Player properties
         self.player_radius = 12
-        # Track player position in grid coordinates (column, row)
-        self.current_col = 1  # Middle column
-        self.current_row = 1  # One tile up from bottom
-        self.update_player_pixel_position()
+
+        # Screen area of the moving parts, and what was last drawn there (None: nothing yet)
+        self.maze_rect = pygame.Rect(self.maze_x, self.maze_y, self.maze_width, self.maze_height).inflate(4, 4)
+        self._drawn_view = None
         
         # Question mark position (bottom tile)
         self.question_x = self.maze_x + self.TILE_SIZE * 1.5
         self.question_y = self.maze_y + self.TILE_SIZE * 2.5  # Adjusted for shorter maze
         
-        # Randomly place snack in either top-left or top-right corner
-        self.snack_col = random.choice([0, 2])  # 0 for left, 2 for right
-        self.snack_row = 0
-        self.update_snack_position()
-        
-        # Movement cooldown
-        self.last_move_time = 0
-        self.move_cooldown = 150  # milliseconds between moves
-        
-        # Game state
-        self.snack_visible = False
-        self.question_mark_visible = True
+        # Grid position, snack placement and game state; moves are paced by the wall clock
+        super().__init__(seed=seed, move_cooldown=150, time_step=0)
         
         # Load font for question mark
         self.font = pygame.font.Font(None, 36)
@@ -71,6 +62,16 @@ class MazeGame:
         # Initialize the static background
         self._init_static_background()
         
+    def reset(self):
+        state = super().reset()
+        self.update_player_pixel_position()
+        self.update_snack_position()
+        return state
+
+    def now(self):
+        """Wall-clock milliseconds since pygame.init()"""
+        return pygame.time.get_ticks()
+
     def _init_static_background(self):
         """Initialize the static background with maze structure"""
         # Draw maze structure on background
@@ -171,47 +172,12 @@ class MazeGame:
                          (int(self.player_x), int(self.player_y)), 
                          self.player_radius)  # Player
     
-    def check_question_mark_interaction(self):
-        """Check if player is on question mark tile and handle interaction."""
-        if (self.question_mark_visible and 
-            self.current_row == 2 and  # Adjusted for shorter maze
-            self.current_col == 1):
-            self.question_mark_visible = False
-            self.snack_visible = True
-            
     def move_player(self, dx, dy):
         """Move player by the given delta in grid coordinates."""
-        current_time = pygame.time.get_ticks()
-        if current_time - self.last_move_time < self.move_cooldown:
-            return
-            
-        new_col = self.current_col + dx
-        new_row = self.current_row + dy
-        
-        # Check if the move is valid
-        valid_move = False
-        
-        # Moving in vertical part (including bottom tile)
-        if self.current_row >= 1:
-            if dx == 0:  # Trying to move vertically
-                if 1 <= new_row <= 2:  # Adjusted range for shorter maze
-                    valid_move = True
-                elif new_row == 0 and self.current_row == 1 and self.current_col == 1:
-                    # Allow moving up to horizontal part from row 1 in middle column
-                    valid_move = True
-        # Moving in horizontal part
-        elif self.current_row == 0:
-            if dy == 0 and 0 <= new_col <= 2:  # Can move left/right in top row
-                valid_move = True
-            elif dy == 1 and new_col == 1:  # Can move down from middle column
-                valid_move = True
-            
-        if valid_move:
-            self.current_col = new_col
-            self.current_row = new_row
+        moved = super().move_player(dx, dy)
+        if moved:
             self.update_player_pixel_position()
-            self.last_move_time = current_time
-            self.check_question_mark_interaction()
+        return moved
             
     def get_display(self):
         """Return the pygame display surface."""
@@ -223,79 +189,41 @@ class MazeGame:
                 pygame.quit()
                 sys.exit()
     
-    def display(self):
-        # Blit the static background
-        self.screen.blit(self.background, (0, 0))
+    def display(self, redraw=False):
+        """
+        Draw the maze, redrawing only what changed since the last call
+        Args:
+            redraw: repaint the whole window (first frame, or after the window was exposed)
+        Returns: the dirty rects to pass to pygame.display.update
+        """
+        view = (self.player_x, self.player_y, self.snack_visible, self.question_mark_visible)
+        if redraw or self._drawn_view is None:
+            # Blit the static background
+            self.screen.blit(self.background, (0, 0))
+            dirty = [self.screen.get_rect()]
+        elif view == self._drawn_view:
+            return []
+        else:
+            # Only the maze area holds moving parts
+            self.screen.blit(self.background, self.maze_rect, self.maze_rect)
+            dirty = [self.maze_rect]
         
         # Draw dynamic game elements
         self.draw_question_mark()
         self.draw_snack()
         self.draw_player()
+        self._drawn_view = view
         
-        # Don't flip display here - let the main loop handle it
+        # Don't update the display here - let the main loop handle it
+        return dirty
     
     def run(self):
         clock = pygame.time.Clock()
         while True:
             self.update()
-            self.display()
+            pygame.display.update(self.display())
             clock.tick(60)  # 60 FPS
 
-    def apply(self, action):
-        """
-        Apply an action to the maze environment.
-        Action should be a tuple of (dx, dy) where:
-        - dx: horizontal movement (-1 for left, 1 for right, 0 for no horizontal movement)
-        - dy: vertical movement (-1 for up, 1 for down, 0 for no vertical movement)
-        Returns: (next_state, reward, done, info)
-        """
-        dx, dy = action
-        
-        # Store current state before move
-        old_state = self.get_state()
-        
-        # Apply the movement
-        self.move_player(dx, dy)
-        
-        # Get new state after move
-        new_state = self.get_state()
-        
-        # Calculate reward (simple reward structure for now)
-        reward = 0
-        if self.snack_visible and self.current_col == self.snack_col and self.current_row == self.snack_row:
-            reward = 1
-            self.snack_visible = False
-        
-        # Game is never done in this simple version
-        done = False
-        
-        return new_state, reward, done, {}
-    
-    def get_state(self):
-        """
-        Returns the current state as a DiscreteDistribution over all possible states.
-        When reward is known, it's a delta distribution (probability 1 for the current state).
-        When reward is unknown, it's a uniform distribution over the two possible reward states
-        for the current player position.
-        """
-        # Convert player position to state index
-        if self.current_row == 0:  # Top row
-            if self.current_col == 0:
-                player_state = 0  # top left
-            elif self.current_col == 1:
-                player_state = 1  # top mid
-            else:
-                player_state = 2  # top right
-        elif self.current_row == 1:
-            player_state = 3  # center
-        else:
-            player_state = 4  # center down
-        
-        # When reward is known, set high logit for the current state
-        reward_state = 0 if self.snack_col == 0 else 1  # left or right
-            
-        return state_to_index(player_state, reward=reward_state)
-
 if __name__ == "__main__":
     game = MazeGame()
     game.run() 
\ No newline at end of file
@@ -0,0 +1,185 @@
+"""
+Procedural maze generator.
+
+Builds the A/B/C/D arrays of a maze generative model for an arbitrary grid or graph
+layout, using the same conventions as the hand-written T-maze:
+
+STATE:       index = reward * num_cells + cell
+OBSERVATION: index = player_obs + num_player_obs * stimulus
+- player_obs is the cell, except on cue cells where each reward location beyond the
+  first gets its own observation (the T-maze's "CD (Right)")
+- stimulus is 0 (positive) on the rewarded cell, 2 (negative) on the other reward
+  cells and 1 (neutral) everywhere else
+ACTIONS:     0=up, 1=down, 2=left, 3=right; moves into walls keep the player in place
+"""
+
+import numpy as np
+from core.transitions import TransitionModel, deterministic_operator
+
+# (row, col) offsets of up, down, left, right
+MOVES = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+NUM_STIMULI = 3
+
+def grid_to_graph(grid):
+    """
+    Convert a grid layout to a cell graph
+    Args:
+        grid: list of strings, '#' is a wall and any other character an open cell
+    Returns:
+        next_cell: (4, num_cells) array, next_cell[a, c] is the cell reached from c with action a
+        cells: list of (row, col) of each open cell, in row-major order
+    """
+    cells = [(r, c) for r, row in enumerate(grid) for c, tile in enumerate(row) if tile != '#']
+    cell_index = {cell: i for i, cell in enumerate(cells)}
+
+    next_cell = np.zeros((len(MOVES), len(cells)), dtype=int)
+    for a, (dr, dc) in enumerate(MOVES):
+        for i, (r, c) in enumerate(cells):
+            next_cell[a, i] = cell_index.get((r + dr, c + dc), i)
+    return next_cell, cells
+
+def open_grid(rows, cols):
+    """Grid layout of a rows x cols room without inner walls"""
+    return ['.' * cols for _ in range(rows)]
+
+class MazeModel:
+    def __init__(self, layout, reward_cells, cue_cells, preference=6.0, dense_transitions=False, dense_observations=False):
+        """
+        Generate a maze generative model
+        Args:
+            layout: grid (list of strings) or graph ((actions, num_cells) next-cell table)
+            reward_cells: cells where the reward can be; their count is the number of reward locations
+            cue_cells: cells whose observation reveals the reward location
+            preference: log-preference for the positive stimulus (and its negative for the negative one)
+            dense_transitions: build B as a dense (actions, n, n) tensor instead of implicit operators
+            dense_observations: give agents a dense (observations, n) matrix instead of an index lookup
+        """
+        if isinstance(layout, np.ndarray):
+            self.next_cell = layout.astype(int)
+        else:
+            self.next_cell, _ = grid_to_graph(layout)
+        self.num_actions, self.num_cells = self.next_cell.shape
+        self.reward_cells = list(reward_cells)
+        self.cue_cells = list(cue_cells)
+        self.num_rewards = len(self.reward_cells)
+
+        self.num_states = self.num_cells * self.num_rewards
+        self.num_player_obs = self.num_cells + len(self.cue_cells) * (self.num_rewards - 1)
+        self.num_observations = self.num_player_obs * NUM_STIMULI
+
+        # Deterministic lookups: true next state per action and observation per state
+        cells = np.arange(self.num_states) % self.num_cells
+        rewards = np.arange(self.num_states) // self.num_cells
+        self.next_state = self.next_cell[:, cells] + rewards * self.num_cells
+        self.observation_index = self._observation_index(cells, rewards)
+
+        self.preference = preference
+        self.dense_observations = dense_observations
+        self._A = None
+        self.B = self._transition_model(dense_transitions)
+        self.c_vector = self._preference_vector(preference)
+        self.px_vector = np.zeros(self.num_states)  # Uniform prior over all states
+
+    def _observation_index(self, cells, rewards):
+        player_obs = cells.copy()
+        for i, cue in enumerate(self.cue_cells):
+            revealed = (cells == cue) & (rewards > 0)
+            player_obs[revealed] = self.num_cells + i * (self.num_rewards - 1) + rewards[revealed] - 1
+
+        stimulus = np.ones(self.num_states, dtype=int)
+        for k, reward_cell in enumerate(self.reward_cells):
+            on_cell = cells == reward_cell
+            stimulus[on_cell] = np.where(rewards[on_cell] == k, 0, 2)
+
+        return player_obs + self.num_player_obs * stimulus
+
+    @property
+    def A(self):
+        """Dense (observations, states) observation matrix, built on first access"""
+        if self._A is None:
+            self._A = np.zeros((self.num_observations, self.num_states))
+            self._A[self.observation_index, np.arange(self.num_states)] = 1.0
+        return self._A
+
+    def _transition_model(self, dense):
+        if dense:
+            B = np.zeros((self.num_actions, self.num_states, self.num_states))
+            for a in range(self.num_actions):
+                B[a, self.next_state[a], np.arange(self.num_states)] = 1.0
+            return TransitionModel(B)
+        return TransitionModel([deterministic_operator(next_state) for next_state in self.next_state])
+
+    def _preference_vector(self, preference):
+        c = np.zeros(self.num_observations)
+        c[:self.num_player_obs] = preference  # positive stimulus
+        c[2 * self.num_player_obs:] = -preference  # negative stimulus
+        return c
+
+    def modality_indices(self):
+        """Observation index of each state split into its (player_obs, stimulus) modalities"""
+        return self.observation_index % self.num_player_obs, self.observation_index // self.num_player_obs
+
+    def modality_preferences(self):
+        """Per-modality preference vectors: indifferent to player_obs, +-preference on the stimulus"""
+        return [np.zeros(self.num_player_obs), np.array([self.preference, 0.0, -self.preference])]
+
+    def agent_params(self, modalities=False):
+        """
+        Keyword arguments for DiscreteAgent
+        The observation model is an IndexMachina lookup (O(n) memory) unless dense_observations
+        was set; per-modality models are always dense matrices
+        Args:
+            modalities: observe (player_obs, stimulus) as two modalities instead of one flat index
+        """
+        if not modalities and not self.dense_observations:
+            return {'px_vector': self.px_vector, 'c_vector': self.c_vector, 'transitioner': self.B,
+                    'machina_type': 'index', 'index': self.observation_index, 'num_observations': self.num_observations}
+        if not modalities:
+            A, c_vector = self.A, self.c_vector
+        else:
+            A = []
+            for index, size in zip(self.modality_indices(), (self.num_player_obs, NUM_STIMULI)):
+                A_i = np.zeros((size, self.num_states))
+                A_i[index, np.arange(self.num_states)] = 1.0
+                A.append(A_i)
+            c_vector = self.modality_preferences()
+        return {'px_vector': self.px_vector, 'c_vector': c_vector, 'transitioner': self.B,
+                'machina_type': 'matrix', 'A': A}
+
+    def factorized_agent_params(self, modalities=False):
+        """
+        Keyword arguments for FactorizedAgent, with the state split into a position factor
+        (moved by the actions) and a reward factor (unaffected by them)
+        Args:
+            modalities: observe (player_obs, stimulus) as two modalities instead of one flat index
+        """
+        cell_model = (TransitionModel([deterministic_operator(next_cell) for next_cell in self.next_cell])
+                      if self.B.tensor is None else TransitionModel(self._cell_tensor()))
+        reward_model = TransitionModel(np.tile(np.eye(self.num_rewards), (self.num_actions, 1, 1)))
+
+        # A[o, cell, reward], from the flat state index reward * num_cells + cell
+        cells, rewards = np.arange(self.num_states) % self.num_cells, np.arange(self.num_states) // self.num_cells
+        if modalities:
+            indices, sizes = self.modality_indices(), (self.num_player_obs, NUM_STIMULI)
+            c_vector = self.modality_preferences()
+        else:
+            indices, sizes = [self.observation_index], [self.num_observations]
+            c_vector = self.c_vector
+        A = []
+        for index, size in zip(indices, sizes):
+            A_i = np.zeros((size, self.num_cells, self.num_rewards))
+            A_i[index, cells, rewards] = 1.0
+            A.append(A_i)
+
+        return {'px_vectors': [np.zeros(self.num_cells), np.zeros(self.num_rewards)], 'c_vector': c_vector,
+                'transitioners': [cell_model, reward_model], 'A': A if modalities else A[0]}
+
+    def _cell_tensor(self):
+        B = np.zeros((self.num_actions, self.num_cells, self.num_cells))
+        for a in range(self.num_actions):
+            B[a, self.next_cell[a], np.arange(self.num_cells)] = 1.0
+        return B
+
+def t_maze():
+    """The hand-written T-maze of matrices.py/transitioner.py, generated procedurally"""
+    return MazeModel(["...", "#.#", "#.#"], reward_cells=[0, 2], cue_cells=[4])
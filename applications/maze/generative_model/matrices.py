@@ -20,7 +20,7 @@ C = preference to the good one, anti-preference to the bad one
 D = uniform over reward
 '''
 
-from .mapping import state_to_index, get_observation_idx
+from .mapping import state_to_index, get_observation_idx, NUM_PLAYER_OBS, NUM_STIMULI
 
 def determine_observation(state):
     """Determine the observation for a given state.
@@ -64,6 +64,15 @@ for state in range(10):
     player_obs, stimulus = determine_observation(state)
     observation_matrix[get_observation_idx(player_obs, stimulus)][state] = 1
 
+# One matrix per observation modality: player position (6x10) and internal stimulus (3x10)
+player_observation_matrix = [[0]*10 for _ in range(NUM_PLAYER_OBS)]
+stimulus_observation_matrix = [[0]*10 for _ in range(NUM_STIMULI)]
+for state in range(10):
+    player_obs, stimulus = determine_observation(state)
+    player_observation_matrix[player_obs][state] = 1
+    stimulus_observation_matrix[stimulus][state] = 1
+observation_matrices = [player_observation_matrix, stimulus_observation_matrix]
+
 # Uniform prior over all 10 states
 priors_vector = [0]*10
 
@@ -73,4 +82,7 @@ for obs in range(6):
     c_vector[get_observation_idx(player_obs=obs, stimulus=0)] = 6
     # Negative preference for bad stimulus (stimulus=2)
     c_vector[get_observation_idx(player_obs=obs, stimulus=2)] = -6
-    # Neutral stimulus (stimulus=1) remains at 0
\ No newline at end of file
+    # Neutral stimulus (stimulus=1) remains at 0
+
+# Per-modality preferences: indifferent to the position, same +-6 on the stimulus
+c_vectors = [[0]*NUM_PLAYER_OBS, [6, 0, -6]]
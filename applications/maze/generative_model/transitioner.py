@@ -1,6 +1,6 @@
 import numpy as np
-from core.distributions import DiscreteDistribution
-from applications.maze.generative_model.mapping import state_to_index, index_to_state
+from core.transitions import TransitionModel
+from applications.maze.generative_model.mapping import state_to_index
 
 # Define position indices
 TL, TC, TR, C, CD = 0, 1, 2, 3, 4
@@ -64,19 +64,38 @@ for j in range(10):
     if not np.any(RIGHT_MATRIX[:, j]):
         RIGHT_MATRIX[j, j] = 1.0
 
-# List of all transition matrices
-TRANSITION_MATRICES = [UP_MATRIX, DOWN_MATRIX, LEFT_MATRIX, RIGHT_MATRIX]
+# All transition matrices as one (actions, 10, 10) tensor; TRANSITION_MATRICES are views into it
+TRANSITION_TENSOR = np.stack([UP_MATRIX, DOWN_MATRIX, LEFT_MATRIX, RIGHT_MATRIX])
+TRANSITION_MATRICES = list(TRANSITION_TENSOR)
 
-def transitioner(state: DiscreteDistribution, action: np.ndarray) -> DiscreteDistribution:
+# Dense transition model over the tensor; core.transitions.TransitionModel also accepts sparse or implicit operators
+transition_model = TransitionModel(TRANSITION_TENSOR)
+
+def transition_probabilities(state_probs: np.ndarray, action: np.ndarray) -> np.ndarray:
+    """
+    Propagate state probabilities through the action-weighted transition model, in probability space.
+
+    Args:
+        state_probs: (10,) probabilities, or (B, 10) for a batch of beliefs
+        action: (4,) action probabilities shared by the batch, or (B, 4) one mixture per belief
+
+    Returns:
+        Next state probabilities with the same leading shape as state_probs
+    """
+    return transition_model.propagate(state_probs, action)
+
+def transitioner(state, action: np.ndarray):
     """
     Transitions the state based on the given action probabilities in the maze environment.
     
     Args:
-        state: A DiscreteDistribution representing the current state (10-length vector)
-        action: A 4-length probability vector for [up, down, left, right] actions
+        state: A DiscreteDistribution representing the current state (10-length vector),
+               or a BatchedDiscreteDistribution of shape (B, 10)
+        action: A 4-length probability vector for [up, down, left, right] actions,
+                or a (B, 4) array with one action vector per batch row
         
     Returns:
-        A DiscreteDistribution representing the next state
+        A DiscreteDistribution (or BatchedDiscreteDistribution) representing the next state
     """
     # The maze layout is:
     # [TL]---[TC]---[TR]
@@ -85,14 +104,4 @@ def transitioner(state: DiscreteDistribution, action: np.ndarray) -> DiscreteDis
     #         |
     #        [CD]
     
-    # Get current state probabilities
-    state_probs = state.get_probabilities()
-
-
-    # Combine transition matrices based on action probabilities
-    combined_matrix = sum(a * m for a, m in zip(action, TRANSITION_MATRICES))
-    
-    # Calculate next state probabilities
-    next_state_probs = combined_matrix @ state_probs
-        
-    return DiscreteDistribution(logits=np.log(next_state_probs + 1e-10))  # Add small constant for numerical stability 
\ No newline at end of file
+    return transition_model(state, action)
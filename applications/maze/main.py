@@ -1,20 +1,29 @@
-from applications.maze.environment import MazeGame
+from applications.maze.simulation import MazeSimulation
 from applications.maze.world import MazeWorld
-from applications.maze.generative_model.matrices import observation_matrix, priors_vector, c_vector
+from applications.maze.generative_model.matrices import observation_matrix, observation_matrices, priors_vector, c_vectors
 from applications.maze.generative_model.transitioner import transitioner
-from applications.maze.display import display_qx_text, get_display_manager
 from agents.discrete_agent import DiscreteAgent
-from applications.maze.utils import handle_input
-import pygame
+from core import instrumentation
+from core.instrumentation import phase
+import argparse
+import time
 import numpy as np
 
+# pygame and the modules built on it are imported by the GUI entry points only, so --headless runs without it
+
 def run_maze_game():
+    import pygame
+    from applications.maze.environment import MazeGame
+    from applications.maze.display import display_qx_text, get_display_manager
+    from applications.maze.utils import handle_input
+
     world = MazeWorld(environment=MazeGame(), machina_type='matrix', A=observation_matrix)
-    agent = DiscreteAgent(px_vector=priors_vector, c_vector=c_vector, transitioner=transitioner, machina_type='matrix', A=observation_matrix, q_learning_rate=10)
+    agent = DiscreteAgent(px_vector=priors_vector, c_vector=c_vectors, transitioner=transitioner, machina_type='matrix', A=observation_matrices, q_learning_rate=10)
     clock = pygame.time.Clock()
     
     # Get display manager
     display_manager = get_display_manager()
+    redraw = True  # Repaint the whole window on the first frame
     
     while True:
         # Handle events
@@ -25,31 +34,148 @@ def run_maze_game():
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 if event.button == 1:  # Left mouse button
                     display_manager.handle_click(event.pos)
+            elif event.type == pygame.VIDEOEXPOSE:
+                redraw = True
         
         # Handle keyboard input
         action = handle_input()
         world.step(action)
-        y = world.observe()
+        with phase('observe'):
+            y = world.observe()
         
         # Store previous Qx values
         prev_qx = np.round(agent.qx.get_probabilities(), 3)
         
-        for _ in range(1): #20
-            agent.adjust_q(y)
+        # Iterate until the VFE stops decreasing (usually one step once q(x) has settled)
+        agent.minimize_vfe(y, max_iterations=20)
             
         # Calculate differences in Q(x) distribution
         qx_differences = np.abs(np.round(agent.qx.get_probabilities(), 3) - prev_qx)
         prev_qx = agent.qx.get_probabilities()
         
-        # Draw everything before flipping
-        world.display()  # This no longer flips the display
-        display_qx_text(world, agent, qx_differences)  # This updates only changed regions
-        
-        # Single synchronized display update
-        pygame.display.flip()
+        with phase('render'):
+            # Draw only what changed, then push just those regions to the screen
+            dirty = world.display(redraw=redraw)
+            dirty += display_qx_text(world, agent, qx_differences, redraw=redraw)
+            if dirty:
+                pygame.display.update(dirty)
+            redraw = False
         
         # Cap the frame rate
         clock.tick(300)
 
+def run_maze_game_threaded(fps=60, depth=3):
+    """
+    Same game, with inference and planning in an InferenceWorker thread:
+    the UI handles input and renders the newest belief snapshot at a fixed frame rate,
+    so a slow inference or planning step never stalls input or drawing.
+    Snapshots published between two frames are dropped; only the latest is shown.
+    """
+    import pygame
+    from applications.maze.environment import MazeGame
+    from applications.maze.display import display_qx_text, get_display_manager
+    from applications.maze.utils import handle_input
+    from applications.maze.worker import InferenceWorker
+
+    world = MazeWorld(environment=MazeGame(), machina_type='matrix', A=observation_matrix)
+    agent = DiscreteAgent(px_vector=priors_vector, c_vector=c_vectors, transitioner=transitioner, machina_type='matrix', A=observation_matrices, q_learning_rate=10)
+    clock = pygame.time.Clock()
+
+    # Get display manager
+    display_manager = get_display_manager()
+    redraw = True  # Repaint the whole window on the first frame
+
+    worker = InferenceWorker(agent, depth=depth)
+    worker.submit(world.observe())
+    worker.start()
+
+    shown, shown_qx = 0, np.round(agent.qx.get_probabilities(), 3)
+    qx_differences = np.zeros_like(shown_qx)
+    try:
+        while True:
+            # Handle events
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    pygame.quit()
+                    return
+                elif event.type == pygame.MOUSEBUTTONDOWN:
+                    if event.button == 1:  # Left mouse button
+                        display_manager.handle_click(event.pos)
+                elif event.type == pygame.VIDEOEXPOSE:
+                    redraw = True
+
+            # Handle keyboard input
+            action = handle_input()
+            world.step(action)
+            with phase('observe'):
+                worker.submit(world.observe())
+
+            snapshot, sequence = worker.snapshots.latest()
+            if snapshot is not None:
+                if sequence != shown:
+                    # Changes since the last snapshot on screen, however many were skipped
+                    qx = np.round(snapshot.agent.qx.get_probabilities(), 3)
+                    qx_differences = np.abs(qx - shown_qx)
+                    shown, shown_qx = sequence, qx
+                plan = snapshot.policies[np.argmin(snapshot.efe)] if snapshot.efe is not None else None
+
+                with phase('render'):
+                    dirty = world.display(redraw=redraw)
+                    dirty += display_qx_text(world, snapshot.agent, qx_differences, redraw=redraw, y=snapshot.y, plan=plan)
+                    if dirty:
+                        pygame.display.update(dirty)
+                    redraw = False
+
+            # Fixed frame rate, independent of how fast the worker infers
+            clock.tick(fps)
+    finally:
+        worker.stop()
+
+def run_headless(num_steps, seed=None, depth=3):
+    """
+    Run the agent against the maze without a display or wall-clock pacing:
+    infer q(x) exactly, take the first action of the minimum-EFE policy and carry
+    the predicted state forward as the next prior (as in MazePopulation).
+    An episode ends when the snack is eaten; the maze and the prior are then reset.
+    Returns: (total reward, steps per second)
+    """
+    world = MazeWorld(environment=MazeSimulation(seed=seed))
+    agent = DiscreteAgent(px_vector=priors_vector, c_vector=c_vectors, transitioner=transitioner, machina_type='matrix', A=observation_matrices, inference='exact')
+
+    total_reward = 0
+    start = time.perf_counter()
+    for _ in range(num_steps):
+        with phase('observe'):
+            y = world.observe()
+        agent.adjust_q(y)
+        policies, efe, _ = agent.plan(depth)
+        action = int(policies[np.argmin(efe), 0])
+        agent.px.logits = np.log(agent.transitioner(state=agent.qx, action=np.eye(4)[action]).get_probabilities() + 1e-16)
+        _, reward, _, _ = world.step(action)
+        total_reward += reward
+        if reward:
+            world.reset()
+            agent.px.logits = priors_vector
+    return total_reward, num_steps / (time.perf_counter() - start)
+
 if __name__ == "__main__":
-    run_maze_game() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="T-maze active inference agent")
+    parser.add_argument('--headless', type=int, metavar='STEPS', help="run this many steps without pygame and report throughput")
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--threaded', action='store_true', help="run inference and planning in a worker thread, rendering at a fixed frame rate")
+    parser.add_argument('--fps', type=int, default=60, help="frame rate of the threaded UI")
+    parser.add_argument('--profile', action='store_true', help="print per-phase call counts and latency percentiles on exit")
+    parser.add_argument('--trace', metavar='PATH', help="write a Chrome trace of every phase to PATH on exit")
+    args = parser.parse_args()
+
+    if args.profile or args.trace:
+        instrumentation.enable(trace=bool(args.trace))
+        instrumentation.dump_on_exit(print_summary=args.profile, trace_path=args.trace)
+
+    if args.headless:
+        total_reward, steps_per_second = run_headless(args.headless, seed=args.seed)
+        print(f"{args.headless} steps, reward {total_reward}, {steps_per_second:.0f} steps/s")
+    elif args.threaded:
+        run_maze_game_threaded(fps=args.fps)
+    else:
+        run_maze_game()
\ No newline at end of file
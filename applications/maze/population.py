@@ -0,0 +1,181 @@
+"""
+Vectorized population of independent maze agents.
+
+Every agent has its own belief, prior and observation model, stored as stacked
+arrays so that one NumPy call advances the whole population:
+observe -> infer (exact posterior) -> score every depth-T policy by its summed EFE -> act.
+The mazes are a VectorMazeEnvironment, so rewards follow the same rules as
+MazeSimulation (the snack only counts once the cue was visited, and eating it
+ends the episode), and agents plan to the same depth as the single-agent runs
+(DiscreteAgent.plan), so population statistics are comparable to them.
+"""
+
+import numpy as np
+from core.distributions import BatchedDiscreteDistribution
+from core.conditional_distributions import ConditionalDiscrete
+from agents.planner import enumerate_policies
+from applications.maze.generative_model.matrices import observation_matrix, priors_vector, c_vector
+from applications.maze.generative_model.transitioner import TRANSITION_TENSOR
+from applications.maze.vector_environment import VectorMazeEnvironment
+eps = 1e-16
+
+class MazePopulation:
+    def __init__(self, num_agents, A=observation_matrix, px_vector=priors_vector, c_vector=c_vector,
+                 transition_matrices=TRANSITION_TENSOR, depth=3, precision=None, seed=None, max_steps=None):
+        """
+        Args:
+            num_agents: number of independent agent/maze pairs (N)
+            A: observation matrix (m, n) shared by all agents, or one per agent (N, m, n);
+               the world emits the most likely observation of each agent's true state under it
+            px_vector: prior logits over the n states at the start of an episode
+            c_vector: preference logits over the m observations
+            transition_matrices: (actions, n, n) tensor, entry [a, i, j] = P(i | j, a)
+            depth: planning horizon T; all actions^T policies are scored (3, as in the single-agent runs)
+            precision: None follows the minimum-EFE policy; a float samples a policy from softmax(-precision * EFE)
+            seed: seed for reward placement and action sampling
+            max_steps: episodes are also ended after this many steps (see VectorMazeEnvironment)
+        """
+        self.num_agents = num_agents
+        self.precision = precision
+        self.rng = np.random.default_rng(seed)
+        self.environment = VectorMazeEnvironment(num_agents, seed=self.rng.integers(2**63), max_steps=max_steps)
+
+        # Generative model, one ConditionalDiscrete per distinct A, broadcast to every agent (N, ...)
+        A = np.asarray(A, dtype=float)
+        self.models = [ConditionalDiscrete(machina_type='matrix', machina_params={'A': A_i})
+                       for A_i in (A if A.ndim == 3 else A[None])]
+        m, n = A.shape[-2:]
+        self.A = np.broadcast_to(np.stack([model.machina.A for model in self.models]), (num_agents, m, n))
+        self.log_likelihood = np.broadcast_to(np.stack([model.log_likelihood_matrix() for model in self.models]), (num_agents, m, n))
+        self.entropy = np.broadcast_to(np.stack([model.observation_entropy() for model in self.models]), (num_agents, n))
+
+        self.B = np.asarray(transition_matrices, dtype=float)  # (actions, n, n)
+        self.num_actions, self.num_states = self.B.shape[0], self.B.shape[1]
+        self.depth = depth
+        self.policies = enumerate_policies(depth, self.num_actions)  # (actions^T, T), trie order
+
+        px = np.exp(np.asarray(px_vector, dtype=float) - np.max(px_vector))
+        self.initial_prior = px / np.sum(px)
+        c = np.exp(np.asarray(c_vector, dtype=float) - np.max(c_vector))
+        self.log_c = np.log(c / np.sum(c) + eps)
+
+        # The world's observations are deterministic: a lookup of each agent's true state
+        self.observation_table = np.argmax(self.A, axis=1)  # (N, n)
+
+        self.reset()
+
+    def reset(self, mask=None):
+        """Start a new episode (random reward placement, initial prior) for every agent or only where mask is True"""
+        if mask is None:
+            self.states = self.environment.reset()
+            self.prior = np.tile(self.initial_prior, (self.num_agents, 1))
+            self.q = self.prior.copy()
+        else:
+            self.states = self.environment.reset(mask)
+            self.prior[mask] = self.initial_prior
+
+    @property
+    def beliefs(self):
+        """Current beliefs of all agents as a BatchedDiscreteDistribution"""
+        return BatchedDiscreteDistribution(logits=np.log(self.q + 1e-10))
+
+    def observe(self):
+        return self.observation_table[np.arange(self.num_agents), self.states]
+
+    def infer(self, y):
+        """Exact posterior q(x) ∝ p(x)·P(y|x) for every agent, in log space"""
+        log_q = np.log(self.prior + 1e-10) + self.log_likelihood[np.arange(self.num_agents), y]
+        log_q -= np.max(log_q, axis=1, keepdims=True)
+        q = np.exp(log_q)
+        self.q = q / np.sum(q, axis=1, keepdims=True)
+        return self.q
+
+    def calculate_efe(self):
+        """
+        EFE of every policy for every agent, summed over the horizon. The policy trie is expanded
+        level by level as in agents.planner.TreePlanner: each prefix is propagated once per action,
+        for all agents at once (N, prefixes, n) -> (N, prefixes * actions, n)
+        Returns:
+            efe: (N, actions^depth) array in the order of self.policies,
+            plus the first-step predicted states s_pi (N, actions, n)
+        """
+        frontier = self.q[:, None, :]
+        G = np.zeros((self.num_agents, 1))
+        first_step = None
+        for _ in range(self.depth):
+            # Child p*A + a extends prefix p with action a
+            s_pi = np.einsum('aij,npj->npai', self.B, frontier).reshape(self.num_agents, -1, self.num_states)
+            # A shared observation model is one matrix product for the whole population
+            o_pi = s_pi @ self.models[0].machina.A.T if len(self.models) == 1 else np.einsum('nmi,nki->nkm', self.A, s_pi)
+            risk = np.sum(o_pi * (np.log(o_pi + eps) - self.log_c), axis=2)
+            ambiguity = np.einsum('nki,ni->nk', s_pi, self.entropy)
+            G = np.repeat(G, self.num_actions, axis=1) + ambiguity + risk
+            if first_step is None:
+                first_step = s_pi
+            frontier = s_pi
+        return G, first_step
+
+    def act(self, efe):
+        """First action of the chosen policy of every agent"""
+        if self.precision is None:
+            return self.policies[np.argmin(efe, axis=1), 0]
+        # Sample from the softmax policy posterior with one uniform per agent
+        logits = -self.precision * efe
+        p = np.exp(logits - np.max(logits, axis=1, keepdims=True))
+        p /= np.sum(p, axis=1, keepdims=True)
+        u = self.rng.random((self.num_agents, 1))
+        chosen = np.minimum(np.sum(np.cumsum(p, axis=1) < u, axis=1), len(self.policies) - 1)
+        return self.policies[chosen, 0]
+
+    def step(self):
+        """
+        Advance all agents by one perception-action cycle
+        Agents whose episode ended (snack eaten, or max_steps) start the next one from the initial prior
+        Returns: (observations, actions, efe, rewards, dones)
+        """
+        y = self.observe()
+        self.infer(y)
+        efe, s_pi = self.calculate_efe()
+        actions = self.act(efe)
+
+        # The predicted state under the chosen action is the prior for the next observation
+        self.prior = s_pi[np.arange(self.num_agents), actions]
+        self.states, rewards, dones, _ = self.environment.apply(actions)
+        self.prior[dones] = self.initial_prior
+        return y, actions, efe, rewards, dones
+
+    def run(self, num_steps, record_beliefs=False):
+        """
+        Run every agent for num_steps cycles
+        Returns:
+            dict of per-agent trajectories:
+            - states: (N, num_steps + 1) true state indices (after the reset of finished episodes)
+            - observations, actions, rewards, dones: (N, num_steps)
+            - efe: (N, num_steps, actions^depth), one column per row of self.policies
+            - beliefs: (N, num_steps, n) posteriors, only if record_beliefs
+        """
+        N = self.num_agents
+        trajectory = {
+            'states': np.zeros((N, num_steps + 1), dtype=int),
+            'observations': np.zeros((N, num_steps), dtype=int),
+            'actions': np.zeros((N, num_steps), dtype=int),
+            'rewards': np.zeros((N, num_steps), dtype=int),
+            'dones': np.zeros((N, num_steps), dtype=bool),
+            'efe': np.zeros((N, num_steps, len(self.policies))),
+        }
+        if record_beliefs:
+            trajectory['beliefs'] = np.zeros((N, num_steps, self.num_states))
+
+        trajectory['states'][:, 0] = self.states
+        for t in range(num_steps):
+            y, actions, efe, rewards, dones = self.step()
+            trajectory['observations'][:, t] = y
+            trajectory['actions'][:, t] = actions
+            trajectory['rewards'][:, t] = rewards
+            trajectory['dones'][:, t] = dones
+            trajectory['efe'][:, t] = efe
+            trajectory['states'][:, t + 1] = self.states
+            if record_beliefs:
+                trajectory['beliefs'][:, t] = self.q
+
+        return trajectory
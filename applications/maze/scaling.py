@@ -0,0 +1,97 @@
+"""
+Scaling harness for maze inference and planning.
+
+Generates open-room mazes of growing size and records wall time and peak traced
+memory of DiscreteAgent.adjust_q (gradient and exact modes) and DiscreteAgent.plan.
+Transitions are implicit operators and observations an index lookup, so memory
+grows linearly with the number of states and every size up to 10^5 runs.
+
+Usage:
+    python -m applications.maze.scaling --sizes 10 100 1000 --depth 2 --output scaling.json
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+import numpy as np
+from agents.discrete_agent import DiscreteAgent
+from applications.maze.generative_model.generator import MazeModel, open_grid, t_maze
+
+DEFAULT_SIZES = [10, 100, 1000, 10000, 100000]
+
+def build_maze(num_states, num_rewards=2):
+    """Open-room maze with about num_states states; the T-maze for the smallest size"""
+    if num_states <= 10 and num_rewards == 2:
+        return t_maze()
+    cells = max(num_states // num_rewards, 2)
+    rows = max(int(np.sqrt(cells)), 1)
+    cols = cells // rows
+    # Reward locations spread along the top row, cue in the middle of the bottom row
+    reward_cells = np.linspace(0, cols - 1, num_rewards).astype(int)
+    cue_cell = (rows - 1) * cols + cols // 2
+    return MazeModel(open_grid(rows, cols), reward_cells=reward_cells, cue_cells=[cue_cell])
+
+def measure(fn, repeats):
+    """Mean wall time over repeats after one warm-up call (caches built), then peak traced memory of one extra call"""
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    elapsed = (time.perf_counter() - start) / repeats
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+def run_scaling(sizes=DEFAULT_SIZES, depth=2, repeats=5):
+    """
+    Args:
+        sizes: target state counts
+        depth: planning horizon for DiscreteAgent.plan
+        repeats: timed calls per measurement
+    Returns:
+        list with one dict of measurements per size
+    """
+    results = []
+    for size in sizes:
+        maze = build_maze(size)
+        row = {'target_states': size, 'num_states': maze.num_states, 'num_observations': maze.num_observations}
+
+        y = int(maze.observation_index[0])
+        # The default 0.005 floor is infeasible once n * min_prob >= 1
+        min_prob = min(0.005, 0.5 / maze.num_states)
+        gradient_agent = DiscreteAgent(**maze.agent_params(), q_learning_rate=10, min_prob=min_prob)
+        exact_agent = DiscreteAgent(**maze.agent_params(), inference='exact', min_prob=min_prob)
+
+        for name, fn in [('adjust_q_gradient', lambda: gradient_agent.adjust_q(y)),
+                         ('adjust_q_exact', lambda: exact_agent.adjust_q(y)),
+                         ('plan', lambda: exact_agent.plan(depth))]:
+            elapsed, peak = measure(fn, repeats)
+            row[f'{name}_seconds'] = elapsed
+            row[f'{name}_peak_bytes'] = peak
+        results.append(row)
+    return results
+
+def print_results(results):
+    print(f"{'states':>8} {'obs':>8} {'grad q (ms)':>12} {'exact q (ms)':>13} {'plan (ms)':>10} {'plan peak (MB)':>15}")
+    for row in results:
+        print(f"{row['num_states']:>8} {row['num_observations']:>8} "
+              f"{row['adjust_q_gradient_seconds'] * 1e3:>12.3f} {row['adjust_q_exact_seconds'] * 1e3:>13.3f} "
+              f"{row['plan_seconds'] * 1e3:>10.3f} {row['plan_peak_bytes'] / 1e6:>15.2f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maze inference/planning scaling harness")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--depth', type=int, default=2)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--output', help="write the results as JSON to this path")
+    args = parser.parse_args()
+
+    results = run_scaling(args.sizes, args.depth, args.repeats)
+    print_results(results)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
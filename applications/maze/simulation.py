@@ -0,0 +1,152 @@
+"""
+Headless T-maze dynamics.
+
+MazeSimulation holds the grid position, snack placement and cue state of the T-maze
+without touching pygame: time is a simulation clock in milliseconds and the snack is
+placed with a seeded RNG, so runs are reproducible and not limited by wall-clock time.
+MazeGame (environment.py) layers the pygame view on top of it.
+
+Usage:
+    env = MazeSimulation(seed=0)
+    state, reward, done, info = env.apply(ACTIONS[UP])
+"""
+
+import numpy as np
+from environments.base import Environment
+from core.instrumentation import timed
+from applications.maze.generative_model.mapping import state_to_index
+
+# Action indices, in the order of the transition matrices, and their (dx, dy) grid moves
+UP, DOWN, LEFT, RIGHT = 0, 1, 2, 3
+ACTIONS = [(0, -1), (0, 1), (-1, 0), (1, 0)]
+
+# (col, row) of each position index 0=top left, 1=top mid, 2=top right, 3=center, 4=center down
+POSITION_CELLS = [(0, 0), (1, 0), (2, 0), (1, 1), (1, 2)]
+START_COL, START_ROW = 1, 1  # Center tile
+SNACK_COLS = [0, 2]  # Top left or top right
+CUE_COL, CUE_ROW = 1, 2  # Question mark on the bottom tile
+
+class MazeSimulation(Environment):
+    def __init__(self, seed=None, move_cooldown=150, time_step=None):
+        """
+        Args:
+            seed: seed of the RNG placing the snack (None for a random placement)
+            move_cooldown: simulated milliseconds that must pass between two moves
+            time_step: simulated milliseconds each apply() advances the clock by;
+                       defaults to move_cooldown so that every action takes effect
+        """
+        self.rng = np.random.default_rng(seed)
+        self.move_cooldown = move_cooldown
+        self.time_step = move_cooldown if time_step is None else time_step
+        self.time = 0
+        self.reset()
+
+    def reset(self):
+        """Put the player back in the center and re-place the snack"""
+        # Track player position in grid coordinates (column, row)
+        self.current_col = START_COL
+        self.current_row = START_ROW
+        self.snack_col = int(self.rng.choice(SNACK_COLS))
+        self.snack_row = 0
+        self.last_move_time = self.now()
+
+        # Game state
+        self.snack_visible = False
+        self.question_mark_visible = True
+        return self.get_state()
+
+    def now(self):
+        """Current time in milliseconds on the simulation clock"""
+        return self.time
+
+    def tick(self, dt):
+        """Advance the simulation clock by dt milliseconds"""
+        self.time += dt
+
+    def check_question_mark_interaction(self):
+        """Check if player is on question mark tile and handle interaction."""
+        if (self.question_mark_visible and
+            self.current_row == CUE_ROW and
+            self.current_col == CUE_COL):
+            self.question_mark_visible = False
+            self.snack_visible = True
+
+    def move_player(self, dx, dy):
+        """
+        Move player by the given delta in grid coordinates.
+        Returns True if the player moved
+        """
+        current_time = self.now()
+        if current_time - self.last_move_time < self.move_cooldown:
+            return False
+
+        new_col = self.current_col + dx
+        new_row = self.current_row + dy
+
+        # Check if the move is valid
+        valid_move = False
+
+        # Moving in vertical part (including bottom tile)
+        if self.current_row >= 1:
+            if dx == 0:  # Trying to move vertically
+                if 1 <= new_row <= 2:
+                    valid_move = True
+                elif new_row == 0 and self.current_row == 1 and self.current_col == 1:
+                    # Allow moving up to horizontal part from row 1 in middle column
+                    valid_move = True
+        # Moving in horizontal part
+        elif self.current_row == 0:
+            if dy == 0 and 0 <= new_col <= 2:  # Can move left/right in top row
+                valid_move = True
+            elif dy == 1 and new_col == 1:  # Can move down from middle column
+                valid_move = True
+
+        if valid_move:
+            self.current_col = new_col
+            self.current_row = new_row
+            self.last_move_time = current_time
+            self.check_question_mark_interaction()
+        return valid_move
+
+    @timed('environment.step')
+    def apply(self, action):
+        """
+        Apply an action to the maze environment.
+        Action should be a tuple of (dx, dy) where:
+        - dx: horizontal movement (-1 for left, 1 for right, 0 for no horizontal movement)
+        - dy: vertical movement (-1 for up, 1 for down, 0 for no vertical movement)
+        or an action index into ACTIONS.
+        Returns: (next_state, reward, done, info)
+        """
+        if isinstance(action, (int, np.integer)):
+            action = ACTIONS[action]
+        dx, dy = action
+
+        self.tick(self.time_step)
+        self.move_player(dx, dy)
+
+        # Calculate reward (simple reward structure for now)
+        reward = 0
+        if self.snack_visible and self.current_col == self.snack_col and self.current_row == self.snack_row:
+            reward = 1
+            self.snack_visible = False
+
+        # Game is never done in this simple version
+        done = False
+
+        return self.get_state(), reward, done, {}
+
+    def get_position(self):
+        """Player position index: 0=top left, 1=top mid, 2=top right, 3=center, 4=center down"""
+        if self.current_row == 0:
+            return self.current_col
+        return 3 if self.current_row == 1 else 4
+
+    def set_position(self, position):
+        """Teleport the player to a position index (no cooldown or cue interaction)"""
+        self.current_col, self.current_row = POSITION_CELLS[position]
+
+    def get_state(self):
+        """Returns the current state as a flat index, see mapping.state_to_index"""
+        reward_state = 0 if self.snack_col == 0 else 1  # left or right
+        return state_to_index(self.get_position(), reward=reward_state)
@@ -0,0 +1,116 @@
+"""
+Vectorized T-maze environment.
+
+Holds N independent mazes as integer arrays (positions, snack columns, cue-revealed
+flags) and advances all of them with a handful of array operations per step.
+Moves and observations are table lookups precomputed from the single-maze rules
+in MazeSimulation and determine_observation, so both environments stay in sync.
+Pairs with batched inference (e.g. MazePopulation or BatchedDiscreteDistribution).
+"""
+
+import numpy as np
+from environments.base import Environment
+from applications.maze.simulation import MazeSimulation, ACTIONS, POSITION_CELLS, SNACK_COLS, START_COL, START_ROW, CUE_COL, CUE_ROW
+from applications.maze.generative_model.matrices import determine_observation
+from applications.maze.generative_model.mapping import state_to_index, get_observation_idx, NUM_POSITIONS, NUM_REWARDS
+from core.instrumentation import timed
+
+START_POSITION = POSITION_CELLS.index((START_COL, START_ROW))
+CUE_POSITION = POSITION_CELLS.index((CUE_COL, CUE_ROW))
+# Position of the snack for each reward location (it sits in the top row)
+SNACK_POSITIONS = np.array([POSITION_CELLS.index((col, 0)) for col in SNACK_COLS])
+
+def position_table():
+    """(actions, positions) table of the position reached from each position with each action"""
+    simulation = MazeSimulation(move_cooldown=0)
+    table = np.zeros((len(ACTIONS), NUM_POSITIONS), dtype=int)
+    for a, (dx, dy) in enumerate(ACTIONS):
+        for position in range(NUM_POSITIONS):
+            simulation.set_position(position)
+            simulation.move_player(dx, dy)
+            table[a, position] = simulation.get_position()
+    return table
+
+def observation_tables():
+    """Per-state lookups (player_obs, stimulus) from determine_observation, indexed by flat state"""
+    observations = np.array([determine_observation(state) for state in range(NUM_POSITIONS * NUM_REWARDS)])
+    return observations[:, 0], observations[:, 1]
+
+class VectorMazeEnvironment(Environment):
+    def __init__(self, num_envs, seed=None, max_steps=None):
+        """
+        Args:
+            num_envs: number of independent mazes (N)
+            seed: seed for the snack placements
+            max_steps: episodes are also ended (truncated) after this many steps; None never truncates
+        """
+        self.num_envs = num_envs
+        self.rng = np.random.default_rng(seed)
+        self.max_steps = max_steps
+
+        self.next_position = position_table()
+        self.player_obs_table, self.stimulus_table = observation_tables()
+        self.observation_table = get_observation_idx(self.player_obs_table, self.stimulus_table)
+
+        self.positions = np.full(num_envs, START_POSITION)
+        self.snack_cols = np.zeros(num_envs, dtype=int)
+        self.cue_revealed = np.zeros(num_envs, dtype=bool)
+        self.steps = np.zeros(num_envs, dtype=int)
+        self.reset()
+
+    def reset(self, mask=None):
+        """
+        Start new episodes, for every maze or only where mask is True
+        Returns the (N,) state indices
+        """
+        index = slice(None) if mask is None else np.flatnonzero(mask)
+        count = self.num_envs if mask is None else len(index)
+        self.positions[index] = START_POSITION
+        self.snack_cols[index] = self.rng.choice(SNACK_COLS, size=count)
+        self.cue_revealed[index] = False
+        self.steps[index] = 0
+        return self.get_state()
+
+    @property
+    def reward_locations(self):
+        """Reward location index per maze (0=left, 1=right)"""
+        return (self.snack_cols != SNACK_COLS[0]).astype(int)
+
+    def get_state(self):
+        """Flat state index of every maze, see mapping.state_to_index"""
+        return state_to_index(self.positions, self.reward_locations)
+
+    def observe(self, modalities=False):
+        """
+        Observation of every maze
+        Returns (N,) flat observation indices, or a (player_obs, stimulus) tuple of (N,) arrays if modalities
+        """
+        states = self.get_state()
+        if modalities:
+            return self.player_obs_table[states], self.stimulus_table[states]
+        return self.observation_table[states]
+
+    @timed('environment.step')
+    def apply(self, actions):
+        """
+        Move every maze by one action and auto-reset the episodes that ended
+        Args:
+            actions: (N,) action indices into simulation.ACTIONS (or one index for all mazes)
+        Returns: (states, rewards, dones, info)
+            states are taken after the auto-reset; info['final_states'] holds the states before it
+        """
+        actions = np.broadcast_to(np.asarray(actions, dtype=int), (self.num_envs,))
+        self.positions = self.next_position[actions, self.positions]
+        self.cue_revealed |= self.positions == CUE_POSITION
+        self.steps += 1
+
+        # The snack can only be eaten once the cue has revealed it
+        rewards = (self.cue_revealed & (self.positions == SNACK_POSITIONS[self.reward_locations])).astype(int)
+        dones = rewards > 0
+        if self.max_steps is not None:
+            dones |= self.steps >= self.max_steps
+
+        final_states = self.get_state()
+        if np.any(dones):
+            self.reset(dones)
+        return self.get_state(), rewards, dones, {'final_states': final_states}
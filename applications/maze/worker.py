@@ -0,0 +1,114 @@
+"""
+Inference and planning off the render thread.
+
+InferenceWorker owns the agent and runs adjust_q and planning in a background thread
+at its own rate. The UI thread submits the latest observation and reads the latest
+Snapshot of the agent. Both directions go through LatestValue, a single-slot handoff:
+only the newest value is kept, so a producer that is faster than its consumer never
+builds a backlog. Stale values are dropped instead of queued.
+
+Usage:
+    worker = InferenceWorker(agent)
+    worker.start()
+    worker.submit(world.observe())
+    snapshot, sequence = worker.snapshots.latest()
+    worker.stop()
+"""
+
+import copy
+import threading
+from collections import namedtuple
+import numpy as np
+
+# What the UI reads: a frozen agent (q(x) and p(x) copied, the rest shared and read-only),
+# the observation its beliefs were inferred from, and the planner's scores
+Snapshot = namedtuple('Snapshot', ['agent', 'y', 'policies', 'efe', 'steps'])
+
+class LatestValue:
+    """
+    Lock-free single-producer handoff of the most recent value.
+    publish() swaps in a new (value, sequence) pair with one reference assignment,
+    which is atomic in CPython, so a reader never sees a half-written value and
+    neither side blocks. Readers use the sequence number to tell new values from
+    ones they have already seen.
+    """
+    def __init__(self, value=None):
+        self._slot = (value, 0)
+
+    def publish(self, value):
+        """Replace the value (call from one producer thread only)"""
+        self._slot = (value, self._slot[1] + 1)
+
+    def latest(self):
+        """Returns (value, sequence) of the newest value, sequence 0 if nothing was published"""
+        return self._slot
+
+class InferenceWorker:
+    def __init__(self, agent, depth=3, tolerance=1e-6, idle_timeout=0.05):
+        """
+        Args:
+            agent: agent to run; the worker thread is its only user once started
+            depth: planning horizon, 0 to skip planning
+            tolerance: once no logit of q(x) moves by more than this and the observation
+                       is unchanged, the worker sleeps until a new observation arrives
+            idle_timeout: seconds an idle worker sleeps before checking again
+        """
+        self.agent = agent
+        self.depth = depth
+        self.tolerance = tolerance
+        self.idle_timeout = idle_timeout
+        self.observations = LatestValue()  # UI thread -> worker
+        self.snapshots = LatestValue()  # worker -> UI thread
+        self.steps = 0
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='inference', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        """Ask the worker to finish its current step and wait for it"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def submit(self, y):
+        """Hand the worker a new observation (only publishes when it differs from the last one)"""
+        if y != self.observations.latest()[0]:
+            self.observations.publish(y)
+            self._wake.set()
+
+    def snapshot(self, y, policies, efe):
+        """Copy the beliefs the worker keeps updating; everything else is only read in this loop"""
+        frozen = copy.copy(self.agent)
+        frozen.qx = copy.deepcopy(self.agent.qx)
+        frozen.px = copy.deepcopy(self.agent.px)
+        return Snapshot(frozen, y, policies, efe, self.steps)
+
+    def _run(self):
+        seen, converged = 0, False
+        while not self._stop.is_set():
+            # Clear before reading, so an observation submitted from here on wakes the wait below
+            self._wake.clear()
+            y, sequence = self.observations.latest()
+            # Nothing observed yet, or converged on the current observation: sleep until the next one
+            if sequence == 0 or (converged and sequence == seen):
+                self._wake.wait(self.idle_timeout)
+                continue
+
+            previous = self.agent.qx.parameters.copy()
+            self.agent.adjust_q(y)
+            policies, efe = None, None
+            if self.depth:
+                policies, efe, _ = self.agent.plan(self.depth)
+            self.steps += 1
+            self.snapshots.publish(self.snapshot(y, policies, efe))
+
+            converged = np.max(np.abs(self.agent.qx.parameters - previous)) < self.tolerance
+            seen = sequence
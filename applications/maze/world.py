@@ -1,29 +1,32 @@
 from worlds.base import World
-from applications.maze.environment import MazeGame
+from applications.maze.simulation import MazeSimulation
 
 #same as the generative model, but doesnt have to be
-from applications.maze.generative_model.matrices import determine_observation, get_observation_idx
+from applications.maze.generative_model.matrices import determine_observation, observation_matrix
 
 class MazeWorld(World):
-    def __init__(self, environment: MazeGame = None, machina_type='discrete', **machina_params):
-        """Initialize the maze world with a maze environment"""
-        super().__init__(environment or MazeGame(), machina_type, **machina_params)
+    def __init__(self, environment: MazeSimulation = None, machina_type='matrix', **machina_params):
+        """Initialize the maze world with a maze environment (headless MazeSimulation by default, MazeGame for the pygame view)"""
+        machina_params.setdefault('A', observation_matrix)
+        super().__init__(environment or MazeSimulation(), machina_type, **machina_params)
     
     def step(self, action):
         """Apply an action to move in the maze"""
         return self._environment.apply(action)
     
+    def reset(self):
+        """Start a new episode in the environment"""
+        return self._environment.reset()
+
     def observe(self):
-        """Return the current observation (position) in the maze as a single index"""
+        """Return the current observation as one index per modality: (player_obs, stimulus)"""
         state = self._environment.get_state()
-        player_obs, stimulus = determine_observation(state=state)
-
-        return get_observation_idx(player_obs, stimulus)
+        return determine_observation(state=state)
     
     def _get_state(self):
         """Return the current state (position) in the maze"""
         return self._environment.get_state() 
 
-    def display(self):
-        """Display the current state of the maze"""
-        self._environment.display()
\ No newline at end of file
+    def display(self, redraw=False):
+        """Display the current state of the maze, returns the dirty rects"""
+        return self._environment.display(redraw=redraw)
\ No newline at end of file
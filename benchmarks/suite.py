@@ -0,0 +1,230 @@
+"""
+Benchmark suite for the inference and planning hot paths.
+
+Every case is timed at several state-space sizes (open-room mazes from the scaling
+harness, the T-maze for the smallest size) and reports:
+- ops_per_sec: calls per second, averaged over enough calls to fill min_time
+- allocated_blocks: memory blocks allocated by one call, counted by the interpreter
+  (sys.getallocatedblocks() before and after, with the garbage collector paused so
+  that cyclic garbage made by the call is counted instead of collected); blocks that
+  reference counting frees again within the call cancel out, so this is a net count
+- peak_bytes: peak traced memory allocated during one call
+- retained_bytes / retained_blocks: memory and blocks still held after that call (a leak indicator)
+
+Results are written as JSON and can be compared against a stored baseline; cases
+that got slower, or whose allocations, peak or retained memory grew, by more than
+the threshold are reported as regressions and make the command exit with status 1.
+
+Usage:
+    python -m benchmarks.suite --output bench.json
+    python -m benchmarks.suite --baseline bench.json --threshold 0.2
+"""
+
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+import numpy as np
+from core.distributions import DiscreteDistribution, Normal
+from core.conditional_distributions import ConditionalDiscrete, ConditionalNormal
+from core.optimizers import SGD
+from agents.discrete_agent import DiscreteAgent
+from applications.maze.scaling import build_maze
+from applications.maze.generative_model.transitioner import transitioner
+
+DEFAULT_SIZES = [10, 100, 1000]
+
+def time_call(fn, min_time=0.2, max_repeats=100000):
+    """Mean seconds per call of fn, after one warm-up call, over at least min_time"""
+    fn()
+    repeats, elapsed = 0, 0.0
+    start = time.perf_counter()
+    while elapsed < min_time and repeats < max_repeats:
+        fn()
+        repeats += 1
+        elapsed = time.perf_counter() - start
+    return elapsed / repeats, repeats
+
+def count_allocations(fn):
+    """Net blocks allocated by one call of fn (including its result), from the interpreter's allocated-block counter"""
+    gc.collect()
+    gc.disable()
+    try:
+        before = sys.getallocatedblocks()
+        result = fn()
+        allocated = sys.getallocatedblocks() - before
+        del result
+    finally:
+        gc.enable()
+    return max(allocated, 0)
+
+def memory_call(fn):
+    """Peak traced memory of one call of fn, and the bytes and blocks it left allocated (retained)"""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    base, _ = tracemalloc.get_traced_memory()
+    fn()
+    current, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    retained_blocks = sum(max(stat.count_diff, 0) for stat in after.compare_to(before, 'filename'))
+    return peak - base, current - base, retained_blocks
+
+def random_logits(n, rng):
+    return rng.normal(size=n)
+
+def sgd_compute_gradients_case(size, rng):
+    """Finite-difference VFE gradient of a discrete q(x): 2n evaluations of the loss"""
+    maze = build_maze(size)
+    agent = DiscreteAgent(**maze.agent_params(), min_prob=None)
+    agent.qx.logits = random_logits(maze.num_states, rng)
+    y = int(maze.observation_index[0])
+    optimizer = SGD(learning_rate=0.1)
+    return lambda: optimizer.compute_gradients(lambda: agent.calculate_vfe(y), agent.qx)
+
+def discrete_negative_expected_log_case(size, rng):
+    """Accuracy -E_q[ln P(y|x)] of a discrete q(x) under a dense (n, n) observation matrix"""
+    q = DiscreteDistribution(logits=random_logits(size, rng))
+    py_x = ConditionalDiscrete(machina_type='matrix', machina_params={'A': rng.random((size, size))})
+    y = int(rng.integers(size))
+    return lambda: q.negative_expected_log(py_x, y)
+
+def conditional_discrete_case(size, rng):
+    """p(y|x) of one state index under a dense (n, n) matrix machina, as in ConditionalDiscrete and World.observe"""
+    py_x = ConditionalDiscrete(machina_type='matrix', machina_params={'A': rng.random((size, size))})
+    x = int(rng.integers(size))
+    return lambda: py_x(x).get_probabilities()
+
+def transitioner_case(size, rng):
+    """One belief propagation through the maze transitions (the T-maze transitioner at the smallest size)"""
+    maze = build_maze(size)
+    state = DiscreteDistribution(logits=random_logits(maze.num_states, rng))
+    action = np.eye(maze.num_actions)[0]
+    transition = transitioner if maze.num_states == 10 else maze.B
+    return lambda: transition(state=state, action=action)
+
+def calculate_efe_case(size, rng):
+    """One-step EFE of one action from the agent's current belief"""
+    maze = build_maze(size)
+    agent = DiscreteAgent(**maze.agent_params(), min_prob=None)
+    agent.qx.logits = random_logits(maze.num_states, rng)
+    action = np.eye(maze.num_actions)[0]
+    return lambda: agent.calculate_efe(state=agent.qx, pi=lambda t: action)
+
+def normal_negative_expected_log_case(size, rng):
+    """Analytic accuracy of a Normal q(x) under linear and quadratic machinas (size independent)"""
+    q = Normal(mean=0.5, std=0.8)
+    linear = ConditionalNormal(machina_type='linear', machina_params={'b1': 1.5, 'b0': -0.2}, std=0.7)
+    quadratic = ConditionalNormal(machina_type='quadratic', machina_params={'a': 0.3, 'b': 1.0, 'c': 0.1}, std=0.7)
+    return lambda: (q.negative_expected_log(linear, 1.2), q.negative_expected_log(quadratic, 1.2))
+
+def maze_step_case(size, rng):
+    """
+    Full perception-action step: observe, exact inference, one-step EFE of every action,
+    act, and carry the predicted state forward as the next prior
+    """
+    maze = build_maze(size)
+    agent = DiscreteAgent(**maze.agent_params(), inference='exact', min_prob=min(0.005, 0.5 / maze.num_states))
+    actions = np.eye(maze.num_actions)
+    world = {'state': int(maze.next_state[0, 0])}
+
+    def step():
+        y = int(maze.observation_index[world['state']])
+        agent.adjust_q(y)
+        efe = [agent.calculate_efe(state=agent.qx, pi=lambda t, a=a: actions[a]) for a in range(maze.num_actions)]
+        action = int(np.argmin(efe))
+        agent.px.logits = np.log(agent.transitioner(state=agent.qx, action=actions[action]).get_probabilities() + 1e-16)
+        world['state'] = int(maze.next_state[action, world['state']])
+    return step
+
+# name -> (case factory, whether it depends on the state-space size)
+CASES = {
+    'sgd_compute_gradients': (sgd_compute_gradients_case, True),
+    'discrete_negative_expected_log': (discrete_negative_expected_log_case, True),
+    'conditional_discrete': (conditional_discrete_case, True),
+    'transitioner': (transitioner_case, True),
+    'calculate_efe': (calculate_efe_case, True),
+    'normal_negative_expected_log': (normal_negative_expected_log_case, False),
+    'maze_step': (maze_step_case, True),
+}
+
+def run_suite(sizes=DEFAULT_SIZES, cases=None, min_time=0.2, seed=0):
+    """
+    Args:
+        sizes: state-space sizes to run size-dependent cases at
+        cases: names of the cases to run (default: all)
+        min_time: seconds each timing runs for at least
+        seed: seed of the random beliefs and matrices
+    Returns:
+        dict with run metadata and one result dict per (case, size)
+    """
+    results = []
+    for name in cases or CASES:
+        factory, sized = CASES[name]
+        for size in (sizes if sized else [None]):
+            fn = factory(size, np.random.default_rng(seed))
+            seconds, repeats = time_call(fn, min_time)
+            allocated = count_allocations(fn)
+            peak, retained, blocks = memory_call(fn)
+            results.append({'name': name, 'size': size, 'ops_per_sec': 1.0 / seconds, 'mean_seconds': seconds,
+                            'repeats': repeats, 'allocated_blocks': allocated, 'peak_bytes': peak,
+                            'retained_bytes': retained, 'retained_blocks': blocks})
+
+    meta = {'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': platform.python_version(),
+            'numpy': np.__version__, 'platform': platform.platform(), 'min_time': min_time}
+    return {'meta': meta, 'results': results}
+
+def compare(results, baseline, threshold=0.2):
+    """
+    Flag cases that regressed against a baseline run
+    A case regresses if its ops/sec fell, or its allocations, peak or retained memory grew, by more than threshold (relative)
+    Returns:
+        list of (name, size, metric, baseline value, current value) tuples
+    """
+    previous = {(row['name'], row['size']): row for row in baseline['results']}
+    regressions = []
+    for row in results['results']:
+        old = previous.get((row['name'], row['size']))
+        if old is None:
+            continue
+        if row['ops_per_sec'] < old['ops_per_sec'] * (1 - threshold):
+            regressions.append((row['name'], row['size'], 'ops_per_sec', old['ops_per_sec'], row['ops_per_sec']))
+        # Small amounts are dominated by allocator noise, so only values above a floor are compared
+        for metric, floor in (('allocated_blocks', 64), ('peak_bytes', 64 * 1024), ('retained_bytes', 64 * 1024)):
+            if metric in old and row[metric] > max(old[metric] * (1 + threshold), floor):
+                regressions.append((row['name'], row['size'], metric, old[metric], row[metric]))
+    return regressions
+
+def print_results(results):
+    print(f"{'case':<32} {'size':>6} {'ops/s':>12} {'allocs':>8} {'peak (KB)':>10} {'retained (KB)':>14} {'retained blocks':>16}")
+    for row in results['results']:
+        size = '-' if row['size'] is None else row['size']
+        print(f"{row['name']:<32} {size:>6} {row['ops_per_sec']:>12.1f} {row['allocated_blocks']:>8} "
+              f"{row['peak_bytes'] / 1024:>10.1f} {row['retained_bytes'] / 1024:>14.1f} {row['retained_blocks']:>16}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks of the inference and planning hot paths")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--cases', nargs='+', choices=list(CASES), help="run only these cases")
+    parser.add_argument('--min-time', type=float, default=0.2, help="seconds to time each case for")
+    parser.add_argument('--output', help="write the results as JSON to this path")
+    parser.add_argument('--baseline', help="compare against a previous JSON run and exit 1 on regressions")
+    parser.add_argument('--threshold', type=float, default=0.2, help="relative slowdown counted as a regression")
+    args = parser.parse_args()
+
+    results = run_suite(args.sizes, args.cases, args.min_time)
+    print_results(results)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for name, size, metric, old, new in regressions:
+            print(f"REGRESSION {name} (size {size}): {metric} {old:.4g} -> {new:.4g}")
+        sys.exit(1 if regressions else 0)
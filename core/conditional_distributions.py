@@ -1,13 +1,24 @@
 import numpy as np
 from abc import ABC, abstractmethod
 from .machinas import LinearMachina, QuadraticMachina, MachinaGenerator
-from .distributions import Normal, DiscreteDistribution
-from core.utils import p2logits
+from .distributions import Normal, DiscreteDistribution, BatchedDiscreteDistribution
+from .parameters import Parameterized, parameter_property, VariableNames, indexed_names
 
-class ConditionalDistribution(ABC):
-    def __init__(self, machina_type, machina_params):
+class ConditionalDistribution(Parameterized, ABC):
+    def __init__(self, machina_type, machina_params, **parameters):
+        """
+        Args:
+            machina_type: type of machina mapping x to the parameters of P(y|x)
+            machina_params: parameters passed to the machina
+            parameters: additional optimizable parameters of P(y|x) (e.g. std)
+        """
         self.machina = MachinaGenerator.create(machina_type, **machina_params)
-        self.variables = [f'machina.{var}' for var in self.machina.variables] + ['std']
+        # The machina's parameters become a view into the head of this buffer
+        self._init_parameters(children=[self.machina], **parameters)
+        machina_variables, own_variables = self.machina.variables, list(parameters)
+        self.variables = VariableNames(len(machina_variables) + len(own_variables),
+                                       lambda i: f'machina.{machina_variables[i]}' if i < len(machina_variables)
+                                       else own_variables[i - len(machina_variables)])
 
     @abstractmethod
     def __call__(self, x):
@@ -15,9 +26,10 @@ class ConditionalDistribution(ABC):
         pass
 
 class ConditionalNormal(ConditionalDistribution):
+    std = parameter_property('std')
+
     def __init__(self, machina_type, machina_params, std=1.0):
-        self.std = std
-        super().__init__(machina_type, machina_params)
+        super().__init__(machina_type, machina_params, std=std)
 
     def __call__(self, x):
         """Compute the conditional distribution for a given x"""
@@ -27,8 +39,78 @@ class ConditionalDiscrete(ConditionalDistribution):
     def __call__(self, x, vector_input=False):
         """
         Compute the conditional discrete distribution for a given x
-        Returns a DiscreteDistribution with probabilities generated by the machina
+        Returns a DiscreteDistribution with probabilities generated by the machina,
+        or a BatchedDiscreteDistribution when x is a (B, n) batch of state vectors
+        or (matrix machina) an integer array of B > 1 state indices
+        (a tensor machina takes a list with one state or vector per factor instead)
         """
         probabilities = self.machina(x, vector_input=vector_input)
-        logits = p2logits(probabilities)
-        return DiscreteDistribution(logits=logits) 
\ No newline at end of file
+        # The machina's output is already a distribution over y: keep it instead of a log/softmax round trip
+        if probabilities.ndim == 2:
+            return BatchedDiscreteDistribution.from_probabilities(probabilities)
+        return DiscreteDistribution.from_probabilities(probabilities)
+
+    def log_likelihood(self, y):
+        """
+        Compute ln P(y|x) for every state x in one array operation
+        (for a tensor machina, an array over the states of the factors it depends on)
+        Matches the per-state path: each column of the machina matrix is normalized as a distribution over y
+        """
+        if hasattr(self.machina, 'log_likelihood'):
+            # Machinas without a dense matrix (IndexMachina) compute it directly
+            return self.machina.log_likelihood(y)
+        return self.log_likelihood_matrix()[y]
+
+    def log_likelihood_matrix(self):
+        """ln P(y|x) for every (y, x) pair, cached until the machina parameters change"""
+        def compute():
+            A = self.machina.A + 1e-10
+            return np.log(np.clip(A / np.sum(A, axis=0), 1e-10, 1.0))
+        return self._cached('log_likelihood_matrix', compute)
+
+    def observation_entropy(self, eps=1e-16):
+        """Entropy -Σ_y A[y, x] ln A[y, x] of the observations in each state x (cached)"""
+        if hasattr(self.machina, 'observation_entropy'):
+            return self.machina.observation_entropy(eps)
+        return self._cached('observation_entropy', lambda: -np.sum(self.machina.A * np.log(self.machina.A + eps), axis=0))
+
+class ConditionalModalities(Parameterized):
+    def __init__(self, machina_type, machina_params):
+        """
+        Several discrete observation modalities y = (y_1, ..., y_M), conditionally independent given x:
+        P(y|x) = Π_i P_i(y_i|x), so log-likelihoods, accuracy and ambiguity add up across modalities
+        while each modality keeps its own (|O_i|, ...) machina
+        Args:
+            machina_type: machina type shared by all modalities ('matrix' or 'tensor')
+            machina_params: list with the machina parameters of each modality
+        """
+        self.modalities = [ConditionalDiscrete(machina_type, params) for params in machina_params]
+        # Every modality's machina becomes a view into one buffer, in modality order
+        self._init_parameters(children=self.modalities)
+        self.variables = indexed_names('parameters', self.parameters.size)
+
+    def __len__(self):
+        return len(self.modalities)
+
+    def __getitem__(self, i):
+        return self.modalities[i]
+
+    def __call__(self, x, vector_input=False):
+        """List with the conditional distribution of each modality for a given x"""
+        return [modality(x, vector_input=vector_input) for modality in self.modalities]
+
+    def log_likelihood(self, y):
+        """
+        ln P(y|x) = Σ_i ln P_i(y_i|x) for every state x
+        Args:
+            y: tuple with one observation per modality
+        """
+        return sum(modality.log_likelihood(y_i) for modality, y_i in zip(self.modalities, y))
+
+    def observation_entropy(self, eps=1e-16):
+        """Entropy of the observations in each state x, summed over the (conditionally independent) modalities"""
+        return sum(modality.observation_entropy(eps) for modality in self.modalities)
+
+def is_multimodal(A):
+    """True for a list of observation matrices/tensors (one per modality) rather than a single one"""
+    return isinstance(A, (list, tuple)) and len(A) > 0 and np.ndim(A[0]) >= 2
@@ -1,9 +1,17 @@
 import numpy as np
 from abc import ABC, abstractmethod
-from .machinas import LinearMachina, QuadraticMachina, MachinaGenerator
+from .machinas import LinearMachina, QuadraticMachina, MatrixMachina, MachinaGenerator
+from .parameters import Parameterized, parameter_property, indexed_names
+from .utils import contract
 EPS=1e-10
 
-class Distribution(ABC):
+class Distribution(Parameterized, ABC):
+    # Monte Carlo settings of the generic estimators (class defaults, see set_monte_carlo)
+    num_samples = 1000
+    antithetic = False
+    control_variates = False
+    common_random_numbers = False
+
     @abstractmethod
     def sample(self):
         """Generate a random sample from the distribution"""
@@ -14,63 +22,162 @@ class Distribution(ABC):
         """Compute the probability density of x under this distribution"""
         pass
     
-    def kl_divergence(self, other, num_samples=1000):
+    def log_probability(self, x):
+        """Log density of x (or of an array of samples)"""
+        return np.log(self.probability(x) + EPS)
+
+    def set_monte_carlo(self, num_samples=None, antithetic=None, control_variates=None, common_random_numbers=None, seed=None):
         """
-        Compute KL divergence using Monte Carlo estimation
-        KL(p||q) = E_p[log p(x) - log q(x)]
+        Configure the Monte Carlo estimators of kl_divergence and negative_expected_log
+        Args:
+            num_samples: samples per estimate
+            antithetic: draw samples in pairs from mirrored noise (u and 1 - u, ε and -ε)
+            control_variates: subtract the regression of the estimand on statistics with known zero mean
+                              (the importance ratio for the KL, zero_mean_statistics of the samples)
+            common_random_numbers: reuse the same noise for every estimate, so that estimates at nearby
+                                   parameters (finite-difference gradients) share their sampling error
+            seed: seed of this distribution's RNG (None keeps numpy's global RNG)
+        Returns: self
         """
-        # Generate samples from this distribution (p)
-        samples = [self.sample() for _ in range(num_samples)]
-        
-        # Compute the Monte Carlo estimate
-        kl_estimate = 0.0
-        epsilon = 1e-10  # Small constant for numerical stability
-        for x in samples:
-            kl_estimate += np.log(self.probability(x) + EPS) - np.log(other.probability(x) + EPS)
+        for name, value in [('num_samples', num_samples), ('antithetic', antithetic),
+                            ('control_variates', control_variates), ('common_random_numbers', common_random_numbers)]:
+            if value is not None:
+                setattr(self, name, value)
+        self._rng = None if seed is None else np.random.default_rng(seed)
+        self._common_noise = {}
+        return self
+
+    # Reparameterization: samples are reparameterize(noise), so variance reduction can work on the noise.
+    # Subclasses that cannot be reparameterized fall back to calling sample() once per sample.
+
+    def sample_noise(self, num_samples, rng):
+        """Base noise of num_samples samples, uniform on [0, 1) unless a subclass uses another"""
+        return rng.random(num_samples)
+
+    def antithetic_noise(self, noise):
+        """Mirror image of the base noise, with the same distribution and negatively correlated samples"""
+        return 1 - noise
+
+    def reparameterize(self, noise):
+        """Map base noise to samples of this distribution"""
+        raise NotImplementedError
+
+    def zero_mean_statistics(self, samples):
+        """Statistics of the samples with known expectation zero, as an (N, k) array (None if there are none)"""
+        return None
+
+    def draw(self, num_samples=None):
+        """num_samples samples as one array, using the configured antithetic and common-random-number modes"""
+        num_samples = num_samples or self.num_samples
+        if type(self).reparameterize is Distribution.reparameterize:
+            if self.antithetic or self.common_random_numbers:
+                raise ValueError(f"{type(self).__name__} has no reparameterize(), so its noise cannot be controlled")
+            return np.array([self.sample() for _ in range(num_samples)])
+        return self.reparameterize(self._noise(num_samples))
+
+    def _noise(self, num_samples):
+        common_noise = getattr(self, '_common_noise', None)
+        if common_noise is None:
+            common_noise = self._common_noise = {}
+        key = (num_samples, self.antithetic)
+        if self.common_random_numbers and key in common_noise:
+            return common_noise[key]
         
-        return kl_estimate / num_samples
+        rng = getattr(self, '_rng', None) or np.random
+        if self.antithetic:
+            half = self.sample_noise((num_samples + 1) // 2, rng)
+            noise = np.concatenate([half, self.antithetic_noise(half)])[:num_samples]
+        else:
+            noise = self.sample_noise(num_samples, rng)
+        if self.common_random_numbers:
+            common_noise[key] = noise
+        return noise
     
-    def negative_expected_log(self, other, y, num_samples=1000):
+    def _monte_carlo_mean(self, values, samples, extra_statistic=None):
+        """Mean of per-sample values, corrected by regression on zero-mean control variates if enabled"""
+        if not self.control_variates:
+            return np.mean(values)
+        statistics = [h for h in (self.zero_mean_statistics(samples), extra_statistic) if h is not None]
+        if not statistics:
+            return np.mean(values)
+        H = np.column_stack(statistics)
+        beta = np.linalg.lstsq(H - np.mean(H, axis=0), values - np.mean(values), rcond=None)[0]
+        return np.mean(values) - np.mean(H, axis=0) @ beta
+
+    def kl_divergence(self, other, num_samples=None):
+        """
+        Compute KL divergence using Monte Carlo estimation, all samples scored at once
+        KL(p||q) = E_p[log p(x) - log q(x)]
+        The control variate is the importance ratio q(x)/p(x) - 1, which has mean zero under p
+        """
+        x = self.draw(num_samples)
+        log_p = self.log_probability(x)
+        log_q = other.log_probability(x)
+        ratio = np.exp(np.clip(log_q - log_p, -50, 50)) - 1
+        return self._monte_carlo_mean(log_p - log_q, x, ratio)
+
+    def negative_expected_log(self, other, y, num_samples=None):
         """
         Calculate -E_Q(x)[ln P(y|x)] where:
         - self represents Q(x)
-        - other(x) returns P(y|x) for a given x
+        - other(x) returns P(y|x) for a given x, or for an array of samples at once
+          (conditionals with log_likelihood(y) give ln P(y|x) for every discrete state instead)
         - y is the observed output
         """
-        # Generate samples from Q(x)
-        x_samples = [self.sample() for _ in range(num_samples)]
-        
-        # Compute the Monte Carlo estimate
-        neg_log_estimate = 0.0
-        for x in x_samples:
-            # Get P(y|x) distribution for this x
-            p_y_given_x = other(x)
-            # Calculate probability of y under P(y|x)
-            neg_log_estimate -= np.log(p_y_given_x.probability(y) + EPS)
-        
-        return neg_log_estimate / num_samples
+        x = self.draw(num_samples)
+        if hasattr(other, 'log_likelihood'):
+            log_likelihood = other.log_likelihood(y)[x]
+        else:
+            log_likelihood = other(x).log_probability(y)
+        # Multivariate observations: one summed log-likelihood per sample
+        log_likelihood = np.sum(np.reshape(log_likelihood, (len(x), -1)), axis=1)
+        return self._monte_carlo_mean(-log_likelihood, x)
 
 class DiscreteDistribution(Distribution):
+    logits = parameter_property('logits')
+
     def __init__(self, logits):
         """
         Initialize a discrete distribution with given logits
         Args:
             logits: numpy array of logits (unconstrained values)
         """
-        self.logits = np.array(logits)
+        self._init_parameters(logits=logits)
         self.n = len(logits)
-        self.variables = [f'logits[{i}]' for i in range(self.n)]  # Each logit is independently optimizable
+        self.variables = indexed_names('logits', self.n)  # Each logit is independently optimizable
+
+    @classmethod
+    def from_probabilities(cls, probs):
+        """
+        Build a distribution directly from (unnormalized) probabilities, one row per distribution for batches.
+        The normalized probabilities are cached, so they are not recomputed through the softmax.
+        A row that sums to zero (e.g. an all-zero likelihood column) becomes uniform, as its logits would.
+        """
+        probs = np.asarray(probs, dtype=float)
+        total = np.sum(probs, axis=-1, keepdims=True)
+        probs = np.where(total > 0, probs / np.where(total > 0, total, 1.0), 1.0 / probs.shape[-1])
+        distribution = cls(logits=np.log(probs + EPS))
+        distribution._cached('probabilities', lambda: probs)
+        return distribution
     
     def get_probabilities(self):
-        """Convert logits to probabilities using softmax"""
+        """Convert logits to probabilities using softmax (cached until the logits change)"""
+        return self._cached('probabilities', self._softmax)
+
+    def get_log_probabilities(self):
+        """Log-probabilities, floored at 1e-10 (cached until the logits change)"""
+        return self._cached('log_probabilities', lambda: np.log(np.clip(self.get_probabilities(), 1e-10, 1.0)))
+
+    def _softmax(self):
         # Numerically stable softmax that preserves gradients
         # Subtract max for numerical stability, but store the max value
-        max_logit = np.max(self.logits)
+        # (reductions run over the last axis so batched subclasses share this code)
+        max_logit = np.max(self.logits, axis=-1, keepdims=True)
         # Ensure logits don't get too negative to prevent underflow
         min_threshold = -100  # exp(-100) is still representable
         shifted_logits = np.maximum(self.logits - max_logit, min_threshold)
         exp_logits = np.exp(shifted_logits)
-        probs = exp_logits / np.sum(exp_logits)
+        probs = exp_logits / np.sum(exp_logits, axis=-1, keepdims=True)
         
         return probs
     
@@ -78,12 +185,20 @@ class DiscreteDistribution(Distribution):
         """Generate a random sample from the discrete distribution"""
         return np.random.choice(self.n, p=self.get_probabilities())
     
+    def reparameterize(self, noise):
+        """Inverse CDF: the state whose cumulative probability first exceeds each uniform"""
+        return np.minimum(np.searchsorted(np.cumsum(self.get_probabilities()), noise, side='right'), self.n - 1)
+
     def probability(self, x):
         """Compute the probability of x under this distribution"""
         if not isinstance(x, (int, np.integer)) or x < 0 or x >= self.n:
             return 0.0
         return self.get_probabilities()[x]
     
+    def log_probability(self, x):
+        """Log-probability of a state index, or of an array of them"""
+        return self.get_log_probabilities()[x]
+
     def kl_divergence(self, other):
         """
         Compute KL divergence between two discrete distributions
@@ -92,16 +207,11 @@ class DiscreteDistribution(Distribution):
         if not isinstance(other, DiscreteDistribution) or other.n != self.n:
             raise ValueError("KL divergence can only be computed between two Discrete distributions of the same size")
         
-        # Get probabilities directly
-        p = self.get_probabilities()
-        q = other.get_probabilities()
-        
-        # Add small epsilon to avoid log(0)
-        p = np.clip(p, 1e-10, 1.0)
-        q = np.clip(q, 1e-10, 1.0)
+        # Get probabilities directly, with a small floor to avoid log(0)
+        p = np.clip(self.get_probabilities(), 1e-10, 1.0)
         
         # Compute KL divergence directly
-        kl = np.sum(p * (np.log(p) - np.log(q)))
+        kl = np.sum(p * (self.get_log_probabilities() - other.get_log_probabilities()), axis=-1)
         
         return kl
     
@@ -116,6 +226,11 @@ class DiscreteDistribution(Distribution):
         q = self.get_probabilities()
         q = np.clip(q, 1e-10, 1.0)
         
+        # Vectorized path: ln P(y|x) for all x at once, accuracy is a single dot product
+        if hasattr(conditional_dist, 'log_likelihood'):
+            return -np.sum(q * conditional_dist.log_likelihood(y), axis=-1)
+
+        # Fallback for plain callables returning P(y|x) one state at a time
         neg_log_estimate = 0.0
         for x in range(self.n):
             p_y_given_x = conditional_dist(x)
@@ -131,20 +246,248 @@ class DiscreteDistribution(Distribution):
         
         return neg_log_estimate
 
+    def _softmax_backward(self, grad_probs):
+        """
+        Chain a gradient w.r.t. the probabilities through the softmax.
+        J^T g = p * (g - Σ p g), with J the softmax Jacobian
+        """
+        p = self.get_probabilities()
+        return p * (grad_probs - np.sum(p * grad_probs, axis=-1, keepdims=True))
+
+    def kl_divergence_gradient(self, other):
+        """
+        Exact gradient of KL(p||q) with respect to self.logits
+        dKL/dp(x) = log p(x) - log q(x) + 1, where the constant is cancelled by the softmax
+        """
+        if not isinstance(other, DiscreteDistribution) or other.n != self.n:
+            raise ValueError("KL divergence can only be computed between two Discrete distributions of the same size")
+
+        return self._softmax_backward(self.get_log_probabilities() - other.get_log_probabilities())
+
+    def negative_expected_log_gradient(self, conditional_dist, y):
+        """
+        Exact gradient of -E_Q(x)[ln P(y|x)] with respect to self.logits
+        - conditional_dist must provide log_likelihood(y), i.e. ln P(y|x) for every x
+        """
+        return self._softmax_backward(-conditional_dist.log_likelihood(y))
+
+    def natural_gradient(self, grad, damping=1e-4):
+        """
+        Precondition a gradient w.r.t. the logits by the inverse (damped) Fisher information
+        F = diag(p) - p p^T of the softmax, solved in O(n) with Sherman-Morrison:
+        (D - p p^T)^-1 g = D^-1 g + D^-1 p · (p^T D^-1 g) / (1 - p^T D^-1 p), D = diag(p) + damping
+        """
+        p = self.get_probabilities()
+        grad = np.reshape(grad, p.shape)
+        d = p + damping
+        inv_d_grad = grad / d
+        inv_d_p = p / d
+        shift = np.sum(p * inv_d_grad, axis=-1, keepdims=True) / (1 - np.sum(p * inv_d_p, axis=-1, keepdims=True))
+        return (inv_d_grad + inv_d_p * shift).ravel()
+
+class BatchedDiscreteDistribution(DiscreteDistribution):
+    def __init__(self, logits):
+        """
+        Initialize a batch of discrete distributions over the same n states
+        Args:
+            logits: array of shape (B, n), one row of logits per distribution
+        """
+        logits = np.atleast_2d(np.asarray(logits, dtype=float))
+        self._init_parameters(logits=logits)
+        self.batch_size, self.n = logits.shape
+        # Flat indices into the parameter buffer (logits[b][i] is not a valid variable path)
+        self.variables = indexed_names('parameters', logits.size)
+
+    def __len__(self):
+        return self.batch_size
+
+    def __getitem__(self, b):
+        """Return the b-th distribution of the batch as a DiscreteDistribution"""
+        return DiscreteDistribution(logits=self.logits[b])
+
+    def sample(self):
+        """Draw one sample per distribution in the batch (inverse CDF, one uniform per row)"""
+        u = np.random.random((self.batch_size, 1))
+        samples = np.sum(np.cumsum(self.get_probabilities(), axis=-1) < u, axis=-1)
+        return np.minimum(samples, self.n - 1)
+
+    def probability(self, x):
+        """
+        Compute the probability of x under each distribution
+        Args:
+            x: state index, or array of B state indices (one per distribution)
+        """
+        return self.get_probabilities()[np.arange(self.batch_size), x]
+
+    def log_probability(self, x):
+        """Log-probability of x under each distribution (x: one state index, or one per distribution)"""
+        return self.get_log_probabilities()[np.arange(self.batch_size), x]
+
+    def negative_expected_log(self, conditional_dist, y):
+        """
+        Calculate -E_Q(x)[ln P(y|x)] for every distribution in the batch
+        - conditional_dist must provide log_likelihood(y)
+        - y is a single observation or an array of B observations
+        Returns an array of shape (B,)
+        """
+        if not hasattr(conditional_dist, 'log_likelihood'):
+            raise ValueError("Batched accuracy needs a conditional distribution with log_likelihood(y)")
+        return super().negative_expected_log(conditional_dist, y)
+
+    # Gradients are flattened to the (B·n,) layout of self.parameters, so optimizers can subtract them directly
+
+    def kl_divergence_gradient(self, other):
+        """Exact gradient of KL(q_b||p_b) for every row, w.r.t. the flat logits"""
+        return super().kl_divergence_gradient(other).ravel()
+
+    def negative_expected_log_gradient(self, conditional_dist, y):
+        """Exact gradient of -E_Q(x)[ln P(y|x)] for every row, w.r.t. the flat logits"""
+        return super().negative_expected_log_gradient(conditional_dist, y).ravel()
+
+class FactorizedDistribution(Distribution):
+    def __init__(self, factor_logits):
+        """
+        Mean-field distribution q(x) = Π_f q_f(x_f) over independent discrete state factors
+        Args:
+            factor_logits: list with one logit vector per factor
+        """
+        self.factors = [DiscreteDistribution(logits=logits) for logits in factor_logits]
+        # The factors' logits become consecutive views into one buffer, so optimizers see a single vector
+        self._init_parameters(children=self.factors)
+        self.shape = tuple(factor.n for factor in self.factors)
+        self.variables = indexed_names('parameters', self.parameters.size)
+
+    @classmethod
+    def from_probabilities(cls, factor_probs):
+        """Build a factorized distribution from (unnormalized) per-factor probabilities"""
+        factor_probs = [np.asarray(p, dtype=float) / np.sum(p) for p in factor_probs]
+        distribution = cls([np.log(p + EPS) for p in factor_probs])
+        for factor, probs in zip(distribution.factors, factor_probs):
+            factor._cached('probabilities', lambda probs=probs: probs)
+        return distribution
+
+    def __len__(self):
+        return len(self.factors)
+
+    def get_probabilities(self):
+        """List of per-factor probability vectors"""
+        return [factor.get_probabilities() for factor in self.factors]
+
+    def get_log_probabilities(self):
+        """List of per-factor log-probability vectors"""
+        return [factor.get_log_probabilities() for factor in self.factors]
+
+    def joint_probabilities(self):
+        """Dense joint P(x_1, ..., x_F) as an array of shape self.shape (only for small models)"""
+        joint = np.ones(())
+        for p in self.get_probabilities():
+            joint = np.multiply.outer(joint, p)
+        return joint
+
+    def sample(self):
+        """Sample every factor independently, returns a tuple of state indices"""
+        return tuple(factor.sample() for factor in self.factors)
+
+    def probability(self, x):
+        """Probability of the factorized state x = (x_1, ..., x_F)"""
+        return np.prod([factor.probability(x_f) for factor, x_f in zip(self.factors, x)])
+
+    def kl_divergence(self, other):
+        """KL between two product distributions is the sum of the per-factor KLs"""
+        if not isinstance(other, FactorizedDistribution) or other.shape != self.shape:
+            raise ValueError("KL divergence can only be computed between Factorized distributions of the same shape")
+        return sum(factor.kl_divergence(other_factor) for factor, other_factor in zip(self.factors, other.factors))
+
+    def expectation(self, tensor, factors, keep=None):
+        """
+        E_q[tensor] over the factors that the tensor's trailing axes are indexed by
+        Args:
+            tensor: array of shape (..., n_f1, ..., n_fk)
+            factors: the factor indices f1, ..., fk of the trailing axes
+            keep: a factor in factors to leave out of the expectation, giving a message over its states
+        """
+        probs = [self.factors[f].get_probabilities() for f in factors]
+        return contract(tensor, probs, keep=None if keep is None else list(factors).index(keep))
+
+    @staticmethod
+    def _modalities(conditional_dist, y):
+        """(conditional, observation) pairs, one per modality (a single one for a plain ConditionalDiscrete)"""
+        if hasattr(conditional_dist, 'modalities'):
+            return list(zip(conditional_dist.modalities, y))
+        return [(conditional_dist, y)]
+
+    def message(self, conditional_dist, y, f):
+        """
+        Mean-field message E_q-f[ln P(y|x)] over the states of factor f, summed over the
+        modalities whose tensor machina depends on f (zero if none does)
+        """
+        message = np.zeros(self.shape[f])
+        for modality, y_i in self._modalities(conditional_dist, y):
+            if f in modality.machina.factors:
+                message = message + self.expectation(modality.log_likelihood(y_i), modality.machina.factors, keep=f)
+        return message
+
+    def negative_expected_log(self, conditional_dist, y):
+        """
+        Calculate -E_Q(x)[ln P(y|x)] for a ConditionalDiscrete over a tensor machina (or ConditionalModalities of them)
+        Each modality only sums over the factors it depends on
+        """
+        return -sum(self.expectation(modality.log_likelihood(y_i), modality.machina.factors)
+                    for modality, y_i in self._modalities(conditional_dist, y))
+
+    def kl_divergence_gradient(self, other):
+        """Exact gradient of KL(q||p) with respect to all factor logits, in buffer order"""
+        return np.concatenate([factor.kl_divergence_gradient(other_factor)
+                               for factor, other_factor in zip(self.factors, other.factors)])
+
+    def negative_expected_log_gradient(self, conditional_dist, y):
+        """
+        Exact gradient of -E_Q(x)[ln P(y|x)] with respect to all factor logits
+        Each factor's gradient is its mean-field message, chained through its softmax
+        """
+        return np.concatenate([factor._softmax_backward(-self.message(conditional_dist, y, f))
+                               for f, factor in enumerate(self.factors)])
+
+    def natural_gradient(self, grad, damping=1e-4):
+        """The Fisher information of a product distribution is block diagonal: precondition each factor's slice"""
+        splits = np.cumsum([factor.n for factor in self.factors])[:-1]
+        return np.concatenate([factor.natural_gradient(g, damping)
+                               for factor, g in zip(self.factors, np.split(grad, splits))])
+
 class Normal(Distribution):
+    mean = parameter_property('mean')
+    std = parameter_property('std')
+
     def __init__(self, mean=0.0, std=1.0):
-        self.mean = mean
-        self.std = std
+        self._init_parameters(mean=mean, std=std)
         self.variables = ['mean', 'std']  # Define optimizable parameters
     
-    def sample(self):
-        """Generate a random sample from the normal distribution"""
-        return np.random.normal(self.mean, self.std)
+    def sample(self, size=None):
+        """Generate a random sample (or an array of size samples) from the normal distribution"""
+        return np.random.normal(self.mean, self.std, size)
     
     def probability(self, x):
         """Compute the probability density of x under this normal distribution"""
         return (1.0 / (self.std * np.sqrt(2 * np.pi))) * np.exp(-0.5 * ((x - self.mean) / self.std)**2)
     
+    def log_probability(self, x):
+        """Log density of x, exact in the tails where probability() underflows"""
+        return -0.5 * np.log(2 * np.pi * self.std**2) - 0.5 * ((x - self.mean) / self.std)**2
+
+    def sample_noise(self, num_samples, rng):
+        return rng.standard_normal(num_samples)
+
+    def antithetic_noise(self, noise):
+        return -noise
+
+    def reparameterize(self, noise):
+        return self.mean + self.std * noise
+
+    def zero_mean_statistics(self, samples):
+        """z and z² - 1 of the standardized samples z = (x - μ)/σ"""
+        z = (samples - self.mean) / self.std
+        return np.column_stack([z, z**2 - 1])
+
     def kl_divergence(self, other):
         """
         Compute KL divergence between two normal distributions
@@ -170,6 +513,7 @@ class Normal(Distribution):
         where:
         - Q(x) ~ N(μ₁, σ₁)
         - P(y|x) ~ N(μ₂(x), σ₂)
+        Linear and quadratic machinas are solved in closed form, other machinas are estimated by Monte Carlo
         """
         # Get P(y|x) distribution for the current mean of Q(x)
         p_y_given_x = conditional_dist(self.mean)
@@ -197,14 +541,137 @@ class Normal(Distribution):
             a = conditional_dist.machina.a
             b = conditional_dist.machina.b
             c = conditional_dist.machina.c
-            # E[(y - (a*x² + b*x + c))²] = (y - a*E[x²] - b*μ₁ - c)² + a²*Var[x²] + b²*σ₁²
+            # E[(y - (a*x² + b*x + c))²] = (y - a*E[x²] - b*μ₁ - c)² + a²*Var[x²] + b²*σ₁² + 2ab*Cov[x², x]
             # E[x²] = μ₁² + σ₁²
             # Var[x²] = 4*μ₁²*σ₁² + 2*σ₁⁴
+            # Cov[x², x] = 2*μ₁*σ₁²
             ex2 = mu1**2 + var1
             varx2 = 4*mu1**2*var1 + 2*var1**2
-            expected_squared_error = (y - a*ex2 - b*mu1 - c)**2 + a**2*varx2 + b**2*var1
+            expected_squared_error = (y - a*ex2 - b*mu1 - c)**2 + a**2*varx2 + b**2*var1 + 4*a*b*mu1*var1
         else:
-            raise ValueError("Unsupported machina type for analytical solution")
+            # No closed form: Monte Carlo estimate with the configured sampling
+            return super().negative_expected_log(conditional_dist, y, num_samples)
         
         # Compute the analytical solution
-        return 0.5 * (np.log(2 * np.pi * var2) + expected_squared_error / var2) 
\ No newline at end of file
+        return 0.5 * (np.log(2 * np.pi * var2) + expected_squared_error / var2)
+
+    def natural_gradient(self, grad, damping=1e-4):
+        """
+        Precondition a gradient w.r.t. (mean, std) by the inverse Fisher information,
+        which is diagonal for a Normal: F = diag(1/σ², 2/σ²)
+        """
+        var = self.std ** 2
+        return np.asarray(grad, dtype=float) / (np.array([1.0, 2.0]) / var + damping)
+
+class DiagonalNormal(Distribution):
+    mean = parameter_property('mean')
+    std = parameter_property('std')
+
+    def __init__(self, mean, std=1.0):
+        """
+        Independent Normals N(mean_i, std_i²) over every entry of an array: a multivariate Normal with
+        diagonal covariance, or many independent beliefs at once. Densities, KLs and expectations are
+        summed over all entries
+        Args:
+            mean: array of means (any shape)
+            std: array of standard deviations of the same shape, or a scalar shared by all entries
+        """
+        mean = np.asarray(mean, dtype=float)
+        self._init_parameters(mean=mean, std=np.broadcast_to(np.asarray(std, dtype=float), mean.shape))
+        self.shape = mean.shape
+        self.variables = indexed_names('parameters', self.parameters.size)
+
+    def sample(self, size=None):
+        """One sample of shape self.shape, or an array of size samples"""
+        return self.reparameterize(np.random.standard_normal(self.shape if size is None else (size,) + self.shape))
+
+    def log_probability(self, x):
+        """Log density of x (shape self.shape), or of each sample of an (N, *shape) array"""
+        log_density = -0.5 * np.log(2 * np.pi * self.std**2) - 0.5 * ((x - self.mean) / self.std)**2
+        return np.sum(log_density, axis=tuple(range(-len(self.shape), 0)))
+
+    def probability(self, x):
+        return np.exp(self.log_probability(x))
+
+    def sample_noise(self, num_samples, rng):
+        return rng.standard_normal((num_samples,) + self.shape)
+
+    def antithetic_noise(self, noise):
+        return -noise
+
+    def reparameterize(self, noise):
+        return self.mean + self.std * noise
+
+    def zero_mean_statistics(self, samples):
+        """z and z² - 1 of every standardized entry, one row per sample"""
+        z = np.reshape((samples - self.mean) / self.std, (len(samples), -1))
+        return np.hstack([z, z**2 - 1])
+
+    def entropy(self):
+        """H = Σ_i 0.5·ln(2πe·σ_i²)"""
+        return np.sum(0.5 * np.log(2 * np.pi * np.e * self.std**2))
+
+    def kl_divergence(self, other):
+        """
+        KL(p||q) = Σ_i log(σq_i/σp_i) + (σp_i² + (μp_i - μq_i)²)/(2σq_i²) - 1/2
+        other may be a DiagonalNormal of the same shape or a scalar Normal shared by every entry
+        """
+        if not isinstance(other, (DiagonalNormal, Normal)):
+            raise ValueError("KL divergence can only be computed between Normal distributions")
+        var1 = self.std ** 2
+        var2 = other.std ** 2
+        return np.sum(np.log(other.std / self.std) + (var1 + (self.mean - other.mean)**2) / (2 * var2) - 0.5)
+
+    def kl_divergence_gradient(self, other):
+        """Exact gradient of KL(p||q) with respect to (mean, std), in buffer order"""
+        var2 = other.std ** 2
+        grad_mean = (self.mean - other.mean) / var2
+        grad_std = -1 / self.std + self.std / var2
+        return np.concatenate([np.broadcast_to(grad_mean, self.shape).ravel(), np.broadcast_to(grad_std, self.shape).ravel()])
+
+    @staticmethod
+    def has_analytic_accuracy(conditional_dist):
+        """Closed forms exist for P(y|x) = N(y; b1·x + b0, σ²) (elementwise) and N(y; A x, σ²) (matrix)"""
+        return hasattr(conditional_dist, 'std') and isinstance(conditional_dist.machina, (LinearMachina, MatrixMachina))
+
+    def _linear_observation(self, machina):
+        """
+        Mean and variance of the predicted observation μ(x) under q(x) for a linear machina:
+        elementwise b1·x + b0, or A x with x flattened
+        """
+        if isinstance(machina, MatrixMachina):
+            A = machina.A
+            return A @ self.mean.ravel(), (A**2) @ (self.std**2).ravel()
+        return machina.b1 * self.mean + machina.b0, machina.b1**2 * self.std**2
+
+    def negative_expected_log(self, conditional_dist, y, num_samples=None):
+        """
+        Calculate -E_Q(x)[ln P(y|x)] summed over the observation dimensions. For linear machinas
+        (see has_analytic_accuracy) it is Σ_j 0.5·ln(2πσ_j²) + ((y_j - E[μ_j])² + Var[μ_j])/(2σ_j²);
+        other machinas are estimated by Monte Carlo
+        """
+        if not self.has_analytic_accuracy(conditional_dist):
+            return super().negative_expected_log(conditional_dist, y, num_samples)
+        mean, variance = self._linear_observation(conditional_dist.machina)
+        var2 = conditional_dist.std ** 2
+        return np.sum(0.5 * np.log(2 * np.pi * var2) + ((y - mean)**2 + variance) / (2 * var2))
+
+    def negative_expected_log_gradient(self, conditional_dist, y):
+        """Exact gradient of -E_Q(x)[ln P(y|x)] with respect to (mean, std) for linear machinas"""
+        machina = conditional_dist.machina
+        mean, _ = self._linear_observation(machina)
+        var2 = conditional_dist.std ** 2
+        residual = (y - mean) / var2
+        if isinstance(machina, MatrixMachina):
+            A = machina.A
+            grad_mean = -(A.T @ np.broadcast_to(residual, mean.shape)).reshape(self.shape)
+            grad_std = self.std * ((A**2).T @ np.broadcast_to(1 / var2, mean.shape)).reshape(self.shape)
+        else:
+            grad_mean = -machina.b1 * residual
+            grad_std = machina.b1**2 * self.std / var2
+        return np.concatenate([np.broadcast_to(grad_mean, self.shape).ravel(), np.broadcast_to(grad_std, self.shape).ravel()])
+
+    def natural_gradient(self, grad, damping=1e-4):
+        """Precondition a gradient w.r.t. (mean, std) by the inverse of the diagonal Fisher information diag(1/σ², 2/σ²)"""
+        var = np.ravel(self.std ** 2)
+        return np.asarray(grad, dtype=float) / (np.concatenate([1 / var, 2 / var]) + damping)
@@ -0,0 +1,202 @@
+"""
+Per-phase timing instrumentation.
+
+Wrap code in a phase with the context manager or the decorator:
+
+    with phase('render'):
+        ...
+
+    @timed('inference')
+    def adjust_q(self, y): ...
+
+Instrumentation is off by default. When it is off, phase() hands back a shared no-op
+context and timed() wrappers only check one flag before calling through, so the
+instrumented modules run at full speed. Turn it on with enable() (or by setting the
+environment variable AIB_INSTRUMENT=1, or AIB_INSTRUMENT=trace to also keep a timeline)
+to record the latency of every call, then read summary() / format_summary() for call
+counts and p50/p95/p99 latencies, or write_chrome_trace(path) for chrome://tracing.
+
+Memory stays bounded however long the run: each phase keeps a fixed histogram of
+log-spaced latency buckets (BUCKETS_PER_DECADE per factor of 10, between MIN_SECONDS
+and MAX_SECONDS) instead of every duration, so percentiles are read from the bucket
+midpoints, within about 6% of the exact value. The timeline is a ring buffer holding
+the most recent trace_capacity events; older ones are dropped and counted.
+"""
+
+import atexit
+import functools
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+import numpy as np
+
+MIN_SECONDS = 1e-7
+MAX_SECONDS = 1e3
+BUCKETS_PER_DECADE = 20
+NUM_BUCKETS = round(math.log10(MAX_SECONDS / MIN_SECONDS) * BUCKETS_PER_DECADE)
+DEFAULT_TRACE_CAPACITY = 1000000
+
+_enabled = False
+_tracing = False
+_timers = {}  # phase -> _Timer
+_events = deque(maxlen=DEFAULT_TRACE_CAPACITY)  # (phase, start, duration, thread id), only while tracing
+_dropped_events = 0
+_origin = time.perf_counter()
+_NULL_CONTEXT = nullcontext()
+
+class _Timer:
+    """Call count, total and log-spaced latency histogram of one phase, O(NUM_BUCKETS) memory"""
+    __slots__ = ('count', 'total', 'min', 'max', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        self.buckets = [0] * NUM_BUCKETS
+
+    def add(self, duration):
+        self.count += 1
+        self.total += duration
+        self.min = min(self.min, duration)
+        self.max = max(self.max, duration)
+        # Durations outside [MIN_SECONDS, MAX_SECONDS) land in the first or last bucket
+        bucket = int((math.log10(max(duration, MIN_SECONDS)) - math.log10(MIN_SECONDS)) * BUCKETS_PER_DECADE)
+        self.buckets[min(bucket, NUM_BUCKETS - 1)] += 1
+
+    def percentiles(self, quantiles):
+        """Geometric midpoint of the bucket holding each quantile, clamped to the observed min and max"""
+        cumulative = np.cumsum(self.buckets)
+        buckets = np.searchsorted(cumulative, np.asarray(quantiles) * self.count, side='left')
+        midpoints = MIN_SECONDS * 10 ** ((buckets + 0.5) / BUCKETS_PER_DECADE)
+        return np.clip(midpoints, self.min, self.max)
+
+def enable(trace=False, trace_capacity=DEFAULT_TRACE_CAPACITY):
+    """
+    Start recording phases
+    Args:
+        trace: also keep calls as timeline events for write_chrome_trace
+        trace_capacity: most recent events the timeline keeps (older ones are dropped)
+    """
+    global _enabled, _tracing, _events
+    _enabled = True
+    _tracing = trace
+    if trace_capacity != _events.maxlen:
+        _events = deque(_events, maxlen=trace_capacity)
+
+def disable():
+    """Stop recording; already recorded phases are kept until reset()"""
+    global _enabled, _tracing
+    _enabled = False
+    _tracing = False
+
+def is_enabled():
+    return _enabled
+
+def reset():
+    """Drop every recorded duration and trace event"""
+    global _dropped_events
+    _timers.clear()
+    _events.clear()
+    _dropped_events = 0
+
+def record(name, start, duration):
+    """Record one call of a phase that started at perf_counter() time start and took duration seconds"""
+    global _dropped_events
+    timer = _timers.get(name)
+    if timer is None:
+        timer = _timers[name] = _Timer()
+    timer.add(duration)
+    if _tracing:
+        if len(_events) == _events.maxlen:
+            _dropped_events += 1
+        _events.append((name, start, duration, threading.get_ident()))
+
+class _Phase:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, self.start, time.perf_counter() - self.start)
+        return False
+
+def phase(name):
+    """Context manager timing the enclosed block as one call of the named phase"""
+    return _Phase(name) if _enabled else _NULL_CONTEXT
+
+def timed(name=None):
+    """
+    Decorator timing every call of a function as one call of the named phase
+    Args:
+        name: phase name, defaults to the function's qualified name
+    """
+    def decorator(fn):
+        phase_name = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(phase_name, start, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+def summary():
+    """
+    Statistics per phase
+    Returns:
+        dict phase -> {count, total, mean, p50, p95, p99}, times in seconds
+        (the percentiles are histogram estimates, see the module docstring)
+    """
+    stats = {}
+    for name, timer in list(_timers.items()):
+        p50, p95, p99 = timer.percentiles([0.5, 0.95, 0.99])
+        stats[name] = {'count': timer.count, 'total': timer.total, 'mean': timer.total / timer.count,
+                       'p50': float(p50), 'p95': float(p95), 'p99': float(p99)}
+    return stats
+
+def format_summary():
+    """Summary table of every phase, slowest total first, latencies in milliseconds"""
+    lines = [f"{'phase':<28} {'calls':>8} {'total (s)':>10} {'p50 (ms)':>10} {'p95 (ms)':>10} {'p99 (ms)':>10}"]
+    for name, row in sorted(summary().items(), key=lambda item: -item[1]['total']):
+        lines.append(f"{name:<28} {row['count']:>8} {row['total']:>10.3f} {row['p50'] * 1e3:>10.3f} "
+                     f"{row['p95'] * 1e3:>10.3f} {row['p99'] * 1e3:>10.3f}")
+    return '\n'.join(lines)
+
+def write_chrome_trace(path):
+    """Write the recorded timeline in Chrome trace-event format (open it in chrome://tracing or Perfetto)"""
+    pid = os.getpid()
+    events = [{'name': name, 'ph': 'X', 'ts': (start - _origin) * 1e6, 'dur': duration * 1e6, 'pid': pid, 'tid': tid}
+              for name, start, duration, tid in list(_events)]
+    with open(path, 'w') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms',
+                   'otherData': {'dropped_events': _dropped_events}}, f)
+
+def dump_on_exit(print_summary=True, trace_path=None):
+    """Print the summary and/or write the Chrome trace when the interpreter exits"""
+    def dump():
+        if print_summary and _timers:
+            print(format_summary())
+        if trace_path:
+            write_chrome_trace(trace_path)
+    atexit.register(dump)
+
+# Opt in from the environment, e.g. AIB_INSTRUMENT=1 python -m applications.maze.main --headless 1000
+# (the summary is printed on exit; with AIB_INSTRUMENT=trace the timeline goes to $AIB_TRACE or trace.json)
+if os.environ.get('AIB_INSTRUMENT', '') in ('1', 'trace'):
+    enable(trace=os.environ['AIB_INSTRUMENT'] == 'trace')
+    dump_on_exit(trace_path=os.environ.get('AIB_TRACE', 'trace.json') if _tracing else None)
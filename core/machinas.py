@@ -1,56 +1,187 @@
 from abc import ABC, abstractmethod
 import numpy as np
+from .parameters import Parameterized, parameter_property, indexed_names
+from .utils import contract
 
-class Machina(ABC):
+class Machina(Parameterized, ABC):
     @abstractmethod
     def __call__(self, x):
         """Compute the output of the machina for a given input x"""
         pass
 
 class LinearMachina(Machina):
+    b1 = parameter_property('b1')
+    b0 = parameter_property('b0')
+
     def __init__(self, b1, b0):
-        self.b1 = b1
-        self.b0 = b0
+        self._init_parameters(b1=b1, b0=b0)
         self.variables = ['b1', 'b0']
     
     def __call__(self, x):
         return self.b1 * x + self.b0
 
 class QuadraticMachina(Machina):
+    a = parameter_property('a')
+    b = parameter_property('b')
+    c = parameter_property('c')
+
     def __init__(self, a, b, c):
-        self.a = a
-        self.b = b
-        self.c = c
+        self._init_parameters(a=a, b=b, c=c)
         self.variables = ['a', 'b', 'c']
     
     def __call__(self, x):
         return self.a * x**2 + self.b * x + self.c
 
 class MatrixMachina(Machina):
+    A = parameter_property('A')
+
     def __init__(self, A):
         """
         Initialize a matrix machina that computes y = Ax
         Args:
             A: numpy array representing the transformation matrix
         """
-        self.A = np.array(A)
-        # Flatten the matrix and create variables for each element
-        self.A_flat = self.A.flatten()
-        self.variables = [f'A_flat[{i}]' for i in range(len(self.A_flat))]
+        self._init_parameters(A=A)
+        # Each element of the flattened matrix is independently optimizable
+        self.variables = indexed_names('A_flat', len(self.A_flat))
+
+    @property
+    def A_flat(self):
+        """Flat read-only view of A in the shared parameter buffer"""
+        view = self.parameters.view()
+        view.flags.writeable = False
+        return view
+
+    @A_flat.setter
+    def A_flat(self, value):
+        self.parameters[:] = np.ravel(value)
+        self.touch()
     
     def __call__(self, x, vector_input=False):
-        """Compute y = Ax for the given input x"""
-        # For discrete observations, x should be a one-hot vector
-        if not vector_input:
-            x_onehot = np.zeros(self.A.shape[1])
-            if isinstance(x, (np.ndarray, list)):
-                x = x[0]  # Take the first element if x is an array
-            x_onehot[int(x)] = 1.0
-            x = x_onehot
+        """
+        Compute y = Ax for the given input x
+        - a state index selects column x of A directly (a read-only view, no one-hot product);
+          a list or a size-1 array takes its first element as the index
+        - an integer array of B > 1 state indices selects B columns at once, returned as rows (B, m)
+        - vector_input: x is a belief vector (n,) giving (m,), or a (B, n) matrix of beliefs giving (B, m)
+        """
+        if vector_input:
+            x = np.asarray(x)
+            # A is a view of A_flat, so optimizer updates are already visible here
+            return self.A @ x if x.ndim == 1 else x @ self.A.T
         
-        # Reshape A_flat back to matrix before multiplication
-        A = self.A_flat.reshape(self.A.shape)
-        return A @ x
+        if isinstance(x, np.ndarray) and x.ndim == 1 and x.size > 1 and x.dtype.kind in 'iu':
+            return self.A[:, x].T
+        if isinstance(x, (np.ndarray, list)):
+            x = x[0]  # Take the first element if x is an array
+        return self.A[:, int(x)]  # A is a read-only view, and so is its column
+
+class TensorMachina(Machina):
+    A = parameter_property('A')
+
+    def __init__(self, A, factors=None):
+        """
+        Initialize a tensor machina that computes y = A ×_1 x_1 ×_2 ... x_F for factorized states
+        Args:
+            A: numpy array of shape (m, n_1, ..., n_k), one trailing axis per state factor it depends on
+            factors: indices of the state factors that A's trailing axes belong to (default: the first k)
+        """
+        A = np.asarray(A, dtype=float)
+        self._init_parameters(A=A)
+        self.factors = list(range(A.ndim - 1)) if factors is None else list(factors)
+        if len(self.factors) != A.ndim - 1:
+            raise ValueError("A needs one trailing axis per entry of factors")
+        self.variables = indexed_names('A_flat', A.size)
+
+    @property
+    def A_flat(self):
+        """Flat read-only view of A in the shared parameter buffer"""
+        view = self.parameters.view()
+        view.flags.writeable = False
+        return view
+
+    @A_flat.setter
+    def A_flat(self, value):
+        self.parameters[:] = np.ravel(value)
+        self.touch()
+
+    def __call__(self, x, vector_input=False):
+        """
+        Compute the observation probabilities for a factorized state
+        Args:
+            x: one entry per state factor (all factors, not only those A depends on):
+               state indices, or probability vectors if vector_input
+        """
+        x = [x[f] for f in self.factors]
+        if not vector_input:
+            return self.A[(slice(None),) + tuple(int(i) for i in x)]
+        return contract(self.A, x)
+
+class IndexMachina(Machina):
+    def __init__(self, index, num_observations):
+        """
+        Deterministic observation model stored as a lookup instead of a one-hot matrix:
+        state x always emits observation index[x], so A[:, x] is the one-hot vector of index[x].
+        Memory is O(n) instead of O(m·n), which keeps mazes with 10^4-10^5 states tractable.
+        Args:
+            index: (n,) observation emitted by each state
+            num_observations: number of observations m
+        """
+        self._init_parameters()  # Nothing to optimize: the observations are fixed
+        self.index = np.asarray(index, dtype=int)
+        self.num_observations = num_observations
+        self.variables = []
+
+    @property
+    def A(self):
+        """Dense (m, n) one-hot matrix, built on every access (only for small models)"""
+        A = np.zeros((self.num_observations, len(self.index)))
+        A[self.index, np.arange(len(self.index))] = 1.0
+        return A
+
+    def __call__(self, x, vector_input=False):
+        """
+        Same inputs and outputs as MatrixMachina, computed with scatter-adds of O(B·n)
+        - a state index (or a list or size-1 array holding one) gives the one-hot vector of its observation,
+          an integer array of B > 1 indices (B, m)
+        - vector_input: a belief (n,) gives the predicted observation probabilities (m,), a (B, n) batch (B, m)
+        """
+        m = self.num_observations
+        if vector_input:
+            x = np.asarray(x, dtype=float)
+            if x.ndim == 1:
+                return np.bincount(self.index, weights=x, minlength=m)
+            # Offset each row into its own block so one bincount scatters the whole batch
+            batch_size = x.shape[0]
+            index = self.index[None, :] + m * np.arange(batch_size)[:, None]
+            return np.bincount(index.ravel(), weights=x.ravel(), minlength=batch_size * m).reshape(batch_size, m)
+
+        if isinstance(x, np.ndarray) and x.ndim == 1 and x.size > 1 and x.dtype.kind in 'iu':
+            probabilities = np.zeros((len(x), m))
+            probabilities[np.arange(len(x)), self.index[x]] = 1.0
+            return probabilities
+        if isinstance(x, (np.ndarray, list)):
+            x = x[0]  # Take the first element if x is an array
+        probabilities = np.zeros(m)
+        probabilities[self.index[int(x)]] = 1.0
+        return probabilities
+
+    def log_likelihood(self, y, floor=1e-10):
+        """
+        ln P(y|x) for every state x, equal to what ConditionalDiscrete derives from the dense matrix:
+        each column of A + floor normalized over the m observations, then clipped to [floor, 1]
+        Args:
+            y: an observation, or an array of B observations giving (B, n)
+        """
+        hit = np.log(1 + floor) - np.log(1 + self.num_observations * floor)
+        miss = np.log(floor)
+        y = np.asarray(y)
+        matches = self.index == y if y.ndim == 0 else self.index[None, :] == y[:, None]
+        return np.where(matches, hit, miss)
+
+    def observation_entropy(self, eps=1e-16):
+        """-Σ_y A[y, x] ln(A[y, x] + eps) for every state x (a single entry of 1 per column)"""
+        return np.full(len(self.index), -np.log(1 + eps))
 
 class MachinaGenerator:
     @staticmethod
@@ -62,5 +193,9 @@ class MachinaGenerator:
             return QuadraticMachina(**params)
         elif machina_type == 'matrix':
             return MatrixMachina(**params)
+        elif machina_type == 'tensor':
+            return TensorMachina(**params)
+        elif machina_type == 'index':
+            return IndexMachina(**params)
         else:
             raise ValueError(f"Unsupported machina type: {machina_type}") 
\ No newline at end of file
@@ -1,8 +1,66 @@
 import numpy as np
+from .instrumentation import timed
+from .utils import project_to_floored_simplex
+
+class ExponentialDecay:
+    def __init__(self, initial_rate, decay_rate=0.5, decay_steps=100, min_rate=0.0):
+        """Learning rate initial_rate * decay_rate^(step / decay_steps), never below min_rate"""
+        self.initial_rate = initial_rate
+        self.decay_rate = decay_rate
+        self.decay_steps = decay_steps
+        self.min_rate = min_rate
+
+    def __call__(self, step):
+        return max(self.min_rate, self.initial_rate * self.decay_rate ** (step / self.decay_steps))
+
+class InverseTimeDecay:
+    def __init__(self, initial_rate, decay=0.01):
+        """Learning rate initial_rate / (1 + decay * step), the Robbins-Monro schedule for noisy gradients"""
+        self.initial_rate = initial_rate
+        self.decay = decay
+
+    def __call__(self, step):
+        return self.initial_rate / (1 + self.decay * step)
+
+class PiecewiseConstant:
+    def __init__(self, boundaries, rates):
+        """
+        Learning rate rates[i] while boundaries[i-1] <= step < boundaries[i]
+        e.g. PiecewiseConstant([100, 200], [0.5, 0.25, 0.125]) halves the rate twice
+        """
+        if len(rates) != len(boundaries) + 1:
+            raise ValueError("Expected one more rate than boundaries")
+        self.boundaries = list(boundaries)
+        self.rates = list(rates)
+
+    def __call__(self, step):
+        return self.rates[np.searchsorted(self.boundaries, step, side='right')]
 
 class SGD:
     def __init__(self, learning_rate=0.1):
+        """
+        Args:
+            learning_rate: a constant, or a schedule mapping the number of apply_gradients
+                           calls so far to a learning rate (e.g. ExponentialDecay)
+        """
         self.learning_rate = learning_rate
+        self.iterations = 0  # apply_gradients calls so far
+
+    def current_learning_rate(self):
+        """Learning rate of the next update"""
+        if callable(self.learning_rate):
+            return self.learning_rate(self.iterations)
+        return self.learning_rate
+
+    def _step(self, grad, learning_rate, key, var):
+        """
+        Update to subtract from a parameter (vector), given its gradient
+        Args:
+            learning_rate: rate of this apply_gradients call
+            key: identifies the parameter across calls, for optimizers that keep per-parameter state
+            var: the distribution the parameter belongs to
+        """
+        return learning_rate * grad
     
     def _get_nested_attr(self, obj, attr_path):
         """Get a nested attribute using dot notation or array indexing"""
@@ -37,62 +95,180 @@ class SGD:
             # Ensure we're setting a scalar value
             if isinstance(value, (list, np.ndarray)):
                 value = value[0] if len(value) > 0 else 0.0
-            array[index] = value
+            if isinstance(array, np.ndarray) and not array.flags.writeable:
+                # Parameter properties are read-only views: assign through the setter, which bumps the version
+                array = array.copy()
+                array[index] = value
+                setattr(obj, attr_name, array)
+            else:
+                array[index] = value
         else:
             setattr(obj, last_attr, value)
     
+    @timed('gradient.apply')
     def apply_gradients(self, grads_and_vars):
         """
         Apply gradients to variables.
         Args:
-            grads_and_vars: List of (gradient, (distribution, var_idx)) pairs.
+            grads_and_vars: List of (gradient vector, distribution) pairs, updated in one array operation.
+                Legacy (gradient, (distribution, var_idx)) pairs are resolved through distribution.variables.
         """
-        for grad, (dist, var_idx) in grads_and_vars:
-            if grad is not None:
+        learning_rate = self.current_learning_rate()
+        for grad, var in grads_and_vars:
+            if grad is None:
+                continue
+            if isinstance(var, tuple):
+                dist, var_idx = var
                 var_path = dist.variables[var_idx]
                 current_value = self._get_nested_attr(dist, var_path)
-                self._set_nested_attr(dist, var_path, current_value - self.learning_rate * grad)
+                self._set_nested_attr(dist, var_path, current_value - self._step(grad, learning_rate, var, dist))
+                dist.touch()
+            else:
+                var.parameters -= self._step(grad, learning_rate, var, var)
+                var.touch()
+        self.iterations += 1
     
+    @timed('gradient')
     def compute_gradients(self, loss_fn, distribution):
         """
-        Compute numerical gradients for all variables in the distribution.
+        Compute numerical gradients for all parameters of the distribution.
         Args:
             loss_fn: Function that returns the loss value.
-            distribution: Distribution object with variables list of variable paths.
+            distribution: Parameterized object (its flat parameters vector is perturbed in place).
         Returns:
-            List of (gradient, (distribution, var_idx)) pairs.
+            List with one (gradient vector, distribution) pair.
         """
-        grads_and_vars = []
         eps = 1e-5
+        params = distribution.parameters
+        grads = np.zeros_like(params)
 
-        # Compute gradient for each variable
-        for var_idx in range(len(distribution.variables)):
-            var_path = distribution.variables[var_idx]
-            original_value = self._get_nested_attr(distribution, var_path)
-            og_loss = loss_fn()
-            
-            # Get original probabilities
-            if hasattr(distribution, 'get_probabilities'):
-                og_probs = distribution.get_probabilities()
-
-            # Compute loss with positive perturbation
-            self._set_nested_attr(distribution, var_path, original_value + eps)
+        # Central difference for each entry of the parameter vector
+        for i in range(params.size):
+            original_value = params[i]
+
+            params[i] = original_value + eps
+            distribution.touch()
             loss_plus = loss_fn()
-            if hasattr(distribution, 'get_probabilities'):
-                plus_probs = distribution.get_probabilities()
-            
-            # Compute loss with negative perturbation
-            self._set_nested_attr(distribution, var_path, original_value - eps)
+
+            params[i] = original_value - eps
+            distribution.touch()
             loss_minus = loss_fn()
-            if hasattr(distribution, 'get_probabilities'):
-                minus_probs = distribution.get_probabilities()
-            
+
             # Restore original value
-            self._set_nested_attr(distribution, var_path, original_value)
-            
-            # Compute central difference gradient
-            grad = (loss_plus - loss_minus) / (2 * eps)
-            
-            grads_and_vars.append((grad, (distribution, var_idx)))
+            params[i] = original_value
+            distribution.touch()
+
+            grads[i] = (loss_plus - loss_minus) / (2 * eps)
         
-        return grads_and_vars 
\ No newline at end of file
+        return [(grads, distribution)]
+
+    @timed('gradient')
+    def compute_analytic_gradients(self, grad_fn, distribution):
+        """
+        Wrap an exact gradient in the same format as compute_gradients.
+        Args:
+            grad_fn: Function that returns the gradient as an array aligned with distribution.parameters.
+            distribution: Parameterized object being optimized.
+        Returns:
+            List with one (gradient vector, distribution) pair.
+        """
+        return [(np.asarray(grad_fn(), dtype=float), distribution)]
+
+class Momentum(SGD):
+    def __init__(self, learning_rate=0.1, momentum=0.9, nesterov=False):
+        """
+        SGD with heavy-ball (or Nesterov) momentum: v = momentum * v + grad
+        Args:
+            nesterov: step along grad + momentum * v instead of v
+        """
+        super().__init__(learning_rate)
+        self.momentum = momentum
+        self.nesterov = nesterov
+        self.velocities = {}
+
+    def _step(self, grad, learning_rate, key, var):
+        velocity = self.momentum * self.velocities.get(key, 0.0) + grad
+        self.velocities[key] = velocity
+        if self.nesterov:
+            return learning_rate * (grad + self.momentum * velocity)
+        return learning_rate * velocity
+
+class Adam(SGD):
+    def __init__(self, learning_rate=0.01, beta1=0.9, beta2=0.999, epsilon=1e-8):
+        """Adam: steps along the bias-corrected first moment, scaled per coordinate by the second moment"""
+        super().__init__(learning_rate)
+        self.beta1 = beta1
+        self.beta2 = beta2
+        self.epsilon = epsilon
+        self.moments = {}  # key -> (steps, first moment, second moment)
+
+    def _step(self, grad, learning_rate, key, var):
+        t, m, v = self.moments.get(key, (0, 0.0, 0.0))
+        t += 1
+        m = self.beta1 * m + (1 - self.beta1) * grad
+        v = self.beta2 * v + (1 - self.beta2) * grad ** 2
+        self.moments[key] = (t, m, v)
+        m_hat = m / (1 - self.beta1 ** t)
+        v_hat = v / (1 - self.beta2 ** t)
+        return learning_rate * m_hat / (np.sqrt(v_hat) + self.epsilon)
+
+class NaturalGradient(SGD):
+    def __init__(self, learning_rate=1.0, damping=1e-4):
+        """
+        Steps along F^-1 grad, with F the Fisher information of the distribution being optimized
+        (its natural_gradient method). For the softmax logits of a discrete q(x) the natural VFE
+        gradient is ln q - ln p - ln P(y|x) up to a constant, so one step with learning_rate=1
+        lands on the exact posterior. Parameters whose distribution has no natural_gradient
+        (or legacy per-variable pairs) get plain SGD steps.
+        Args:
+            damping: added to the Fisher diagonal, bounds the step where probabilities vanish
+        """
+        super().__init__(learning_rate)
+        self.damping = damping
+
+    def _step(self, grad, learning_rate, key, var):
+        if key is var and hasattr(var, 'natural_gradient'):
+            grad = var.natural_gradient(grad, self.damping)
+        return learning_rate * grad
+
+class MirrorDescent(SGD):
+    def __init__(self, learning_rate=1.0, floor=None):
+        """
+        Exponentiated-gradient (mirror descent) updates of discrete distributions on the probability simplex:
+        q' ∝ q · exp(-learning_rate · dF/dq), then the KL projection onto {q >= floor, Σq = 1}.
+        The gradient w.r.t. the probabilities is recovered from the logit gradient (p ⊙ (dF/dq - E_q[dF/dq]))
+        up to a constant that the normalization removes, so it plugs into the same compute_gradients output.
+        Works on batched (B, n) beliefs and on each factor of a FactorizedDistribution; other parameters
+        get plain SGD steps.
+        Args:
+            floor: minimum probability kept by the projection (None: no floor)
+        """
+        super().__init__(learning_rate)
+        self.floor = floor
+
+    def _mirror_logits(self, dist, grad, learning_rate):
+        """Logits of the updated distribution (normalized, so that ln q' = logits)"""
+        p = dist.get_probabilities()
+        grad = np.reshape(grad, p.shape)
+        grad_p = np.divide(grad, p, out=np.zeros_like(grad), where=p > 0)
+        logits = dist.logits - learning_rate * grad_p
+        logits = logits - np.max(logits, axis=-1, keepdims=True)
+        q = np.exp(logits)
+        q /= np.sum(q, axis=-1, keepdims=True)
+        if self.floor:
+            q = project_to_floored_simplex(q, self.floor)
+        return np.log(q)
+
+    def _step(self, grad, learning_rate, key, var):
+        if key is not var:
+            return learning_rate * grad
+        if hasattr(var, 'factors'):
+            splits = np.cumsum([factor.n for factor in var.factors])[:-1]
+            logits = np.concatenate([self._mirror_logits(factor, g, learning_rate).ravel()
+                                     for factor, g in zip(var.factors, np.split(grad, splits))])
+        elif hasattr(var, 'logits'):
+            logits = self._mirror_logits(var, grad, learning_rate).ravel()
+        else:
+            return learning_rate * grad
+        # apply_gradients subtracts the step, which leaves exactly the new logits
+        return var.parameters - logits
@@ -0,0 +1,129 @@
+import numpy as np
+from collections.abc import Sequence
+
+class ParameterStore:
+    def __init__(self, values):
+        """
+        Contiguous float buffer that every parameter view of an object tree is carved from
+        Args:
+            values: flat array of initial parameter values
+        """
+        self.data = np.array(values, dtype=float).ravel()
+        # Bumped on every write, so derived quantities can be cached per parameter change
+        self.version = 0
+
+class Parameterized:
+    """
+    Mixin for objects whose optimizable parameters live in one contiguous buffer.
+    Subclasses call _init_parameters(...) once in __init__ and expose each named
+    parameter with parameter_property(name). Optimizers read and write the whole
+    vector through self.parameters instead of resolving string paths.
+
+    Parameter properties return read-only views, so every write goes either through
+    the property setter (which bumps the version) or through self.parameters, which
+    optimizers own and must follow with touch().
+    """
+    def _init_parameters(self, children=(), **values):
+        """
+        Register parameters in a fresh buffer
+        Args:
+            children: Parameterized objects whose parameters are laid out first (in order)
+                      and re-bound as views into this object's buffer
+            values: name -> initial value (scalar or array) of this object's own parameters
+        """
+        self._children = list(children)
+        self._layout = {}
+
+        chunks = [child.parameters for child in self._children]
+        offset = sum(chunk.size for chunk in chunks)
+        for name, value in values.items():
+            value = np.asarray(value, dtype=float)
+            self._layout[name] = (offset, value.shape)
+            offset += value.size
+            chunks.append(value.ravel())
+
+        self._bind(ParameterStore(np.concatenate(chunks) if chunks else np.zeros(0)), 0, offset)
+
+    def _bind(self, store, offset, size):
+        """Point this object (and its children) at a slice of store"""
+        self._store = store
+        self._offset = offset
+        self._cache = {}
+        self.parameters = store.data[offset:offset + size]
+
+        child_offset = offset
+        for child in self._children:
+            child_size = child.parameters.size
+            child._bind(store, child_offset, child_size)
+            child_offset += child_size
+
+    @property
+    def version(self):
+        """Version of the shared buffer, bumped on every write"""
+        return self._store.version
+
+    def touch(self):
+        """Mark the parameters as changed, invalidating every cache built on the buffer"""
+        self._store.version += 1
+
+    def _cached(self, key, compute):
+        """Return compute(), memoized until the next write to the parameter buffer"""
+        hit = self._cache.get(key)
+        if hit is not None and hit[0] == self._store.version:
+            return hit[1]
+        value = compute()
+        if isinstance(value, np.ndarray):
+            # Cached arrays are shared between callers
+            value.flags.writeable = False
+        self._cache[key] = (self._store.version, value)
+        return value
+
+    def _get_parameter(self, name):
+        start, shape = self._layout[name]
+        size = int(np.prod(shape))
+        view = self.parameters[start:start + size]
+        if shape == ():
+            return view[0]
+        view = view.reshape(shape)
+        # In-place writes would bypass the version stamp and leave cached values stale
+        view.flags.writeable = False
+        return view
+
+    def _set_parameter(self, name, value):
+        start, shape = self._layout[name]
+        size = int(np.prod(shape))
+        self.parameters[start:start + size] = np.ravel(value)
+        self.touch()
+
+def parameter_property(name):
+    """Expose a registered parameter as an attribute backed by the shared buffer"""
+    return property(lambda self: self._get_parameter(name),
+                    lambda self, value: self._set_parameter(name, value))
+
+class VariableNames(Sequence):
+    def __init__(self, length, name_fn):
+        """
+        Read-only list of variable paths generated on demand, so large matrices
+        don't allocate one string per parameter
+        Args:
+            length: number of variables
+            name_fn: function mapping an index in [0, length) to its variable path
+        """
+        self._length = length
+        self._name_fn = name_fn
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self._length))]
+        if i < 0:
+            i += self._length
+        if not 0 <= i < self._length:
+            raise IndexError("variable index out of range")
+        return self._name_fn(i)
+
+def indexed_names(name, count):
+    """Variable paths name[0], ..., name[count - 1]"""
+    return VariableNames(count, lambda i: f'{name}[{i}]')
@@ -0,0 +1,90 @@
+import numpy as np
+from .distributions import DiscreteDistribution, BatchedDiscreteDistribution
+
+class TransitionModel:
+    def __init__(self, transitions):
+        """
+        Action-conditioned state transitions P(x'|x, a), usable wherever a transitioner is expected
+        Args:
+            transitions: either a dense (actions, n, n) tensor with entry [a, i, j] = P(i | j, a),
+                or a list with one entry per action, each of which is
+                - a dense (n, n) array,
+                - a sparse matrix (e.g. scipy.sparse CSR) supporting `matrix @ array`, or
+                - an implicit operator: a callable mapping probabilities (n,) or (B, n) to next probabilities
+        """
+        if isinstance(transitions, np.ndarray) and transitions.ndim == 3:
+            self.tensor = transitions.astype(float)
+            self.operators = list(self.tensor)
+        else:
+            self.tensor = None
+            self.operators = list(transitions)
+        self.num_actions = len(self.operators)
+
+    def _apply(self, operator, state_probs):
+        """Propagate probabilities through a single action's operator"""
+        if callable(operator):
+            return operator(state_probs)
+        # Dense or sparse matrix: columns are "from" states, so batches go through the transpose
+        if state_probs.ndim == 1:
+            return np.asarray(operator @ state_probs)
+        return np.asarray(operator @ state_probs.T).T
+
+    def propagate(self, state_probs, action):
+        """
+        Next-state probabilities under an action mixture, in probability space
+        Args:
+            state_probs: (n,) probabilities, or (B, n) for a batch of beliefs
+            action: (actions,) probabilities shared by the batch, or (B, actions) one mixture per belief
+        Returns:
+            Next state probabilities with the same shape as state_probs, (B, n) if either input is batched
+        """
+        action = np.asarray(action, dtype=float)
+        if action.ndim == 2:
+            # One belief under B action mixtures is a batch of B beliefs
+            state_probs = np.atleast_2d(state_probs)
+
+        if self.tensor is not None:
+            if action.ndim == 1:
+                # One mixture for everything: mix the matrices once, then a single product
+                return state_probs @ np.tensordot(action, self.tensor, axes=1).T
+            per_action = np.einsum('aij,bj->bai', self.tensor, state_probs)
+            return np.einsum('ba,bai->bi', action, per_action)
+
+        # Operators are only applied for actions with non-zero weight, so one-hot actions cost a single pass
+        next_state_probs = np.zeros((len(action), state_probs.shape[-1]) if action.ndim == 2 else np.shape(state_probs))
+        for a, operator in enumerate(self.operators):
+            weight = action[..., a]
+            if not np.any(weight):
+                continue
+            weight = weight[:, None] if action.ndim == 2 else weight
+            next_state_probs += weight * self._apply(operator, state_probs)
+        return next_state_probs
+
+    def __call__(self, state, action):
+        """
+        Transition a (batched) DiscreteDistribution, same interface as the maze transitioner
+        """
+        next_state_probs = self.propagate(state.get_probabilities(), action)
+        distribution = BatchedDiscreteDistribution if next_state_probs.ndim == 2 else DiscreteDistribution
+        return distribution.from_probabilities(next_state_probs)
+
+def deterministic_operator(next_state):
+    """
+    Implicit operator for deterministic transitions (e.g. a neighbour shift on a grid)
+    Args:
+        next_state: (n,) array, next_state[j] is the state reached from j
+    Returns:
+        Callable mapping (n,) or (B, n) probabilities to next probabilities in O(B·n)
+    """
+    next_state = np.asarray(next_state, dtype=int)
+    n = len(next_state)
+
+    def operator(state_probs):
+        if state_probs.ndim == 1:
+            return np.bincount(next_state, weights=state_probs, minlength=n)
+        # Offset each row into its own block so one bincount scatters the whole batch
+        batch_size = state_probs.shape[0]
+        index = next_state[None, :] + n * np.arange(batch_size)[:, None]
+        return np.bincount(index.ravel(), weights=state_probs.ravel(), minlength=batch_size * n).reshape(batch_size, n)
+
+    return operator
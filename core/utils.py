@@ -22,4 +22,57 @@ def p2logits(p):
     Returns:
         Array of logits
     """
-    return np.log(p + 1e-10)  # Add small epsilon to avoid log(0) 
\ No newline at end of file
+    return np.log(p + 1e-10)  # Add small epsilon to avoid log(0)
+
+def contract(tensor, vectors, keep=None):
+    """
+    Contract the trailing axes of a tensor with one vector each, e.g. E_q[T] under a product of factors.
+
+    Args:
+        tensor: array of shape (..., n_1, ..., n_F)
+        vectors: F vectors, vectors[f] of length n_f
+        keep: index f of a factor axis to leave uncontracted (None contracts all of them)
+
+    Returns:
+        Array of shape (...,), or (..., n_keep) when keep is given
+    """
+    lead = tensor.ndim - len(vectors)
+    axes = 'abcdefghijklmnopqrstuvwxyz'[:tensor.ndim]
+    operands, subscripts = [tensor], [axes]
+    for f, vector in enumerate(vectors):
+        if f != keep:
+            operands.append(vector)
+            subscripts.append(axes[lead + f])
+    output = axes[:lead] + (axes[lead + keep] if keep is not None else '')
+    return np.einsum(','.join(subscripts) + '->' + output, *operands)
+
+def project_to_floored_simplex(p, floor):
+    """
+    Project probabilities onto the floored simplex {q : q >= floor, Σq = 1} in KL divergence,
+    the projection that matches multiplicative (mirror descent) updates.
+    The solution keeps the largest entries proportional to p and raises the rest to the floor:
+    q = max(floor, s·p), with s found by sorting each row once.
+
+    Args:
+        p: array of shape (..., n) of non-negative (possibly unnormalized) probabilities
+        floor: minimum probability, at most 1/n (larger floors give the uniform distribution)
+
+    Returns:
+        Array of shape (..., n)
+    """
+    p = np.asarray(p, dtype=float)
+    n = p.shape[-1]
+    # Rows without any mass carry no preference between states
+    p = np.where(np.sum(p, axis=-1, keepdims=True) > 0, p, 1.0)
+    if floor * n >= 1:
+        return np.full(p.shape, 1.0 / n)
+
+    # With the k largest entries scaled and the other n - k floored, s_k = (1 - (n - k)·floor) / Σ_top-k p.
+    # The k for which the k-th largest entry stays above the floor form a prefix; the last one is the solution
+    sorted_p = -np.sort(-p, axis=-1)
+    k = np.arange(1, n + 1)
+    top_mass = np.cumsum(sorted_p, axis=-1)
+    scale = (1 - (n - k) * floor) / np.maximum(top_mass, 1e-300)
+    num_scaled = np.sum(scale * sorted_p >= floor, axis=-1, keepdims=True)
+    s = np.take_along_axis(scale, np.maximum(num_scaled - 1, 0), axis=-1)
+    return np.maximum(floor, s * p)
@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+from core.distributions import BatchedDiscreteDistribution
+from core.conditional_distributions import ConditionalDiscrete
+from core.optimizers import SGD, Adam
+
+def batched_vfe(q, p, py_x, y):
+    return np.sum(q.kl_divergence(p) + q.negative_expected_log(py_x, y))
+
+@pytest.mark.parametrize('optimizer', [SGD(learning_rate=0.5), Adam(learning_rate=0.05)])
+def test_optimizers_step_batched_distribution(optimizer):
+    rng = np.random.default_rng(0)
+    q = BatchedDiscreteDistribution(logits=rng.normal(size=(4, 10)))
+    p = BatchedDiscreteDistribution(logits=rng.normal(size=(4, 10)))
+    py_x = ConditionalDiscrete(machina_type='matrix', machina_params={'A': rng.random((3, 10))})
+    y = np.array([0, 1, 2, 0])
+
+    grad_fn = lambda: q.kl_divergence_gradient(p) + q.negative_expected_log_gradient(py_x, y)
+    assert grad_fn().shape == q.parameters.shape
+
+    start = batched_vfe(q, p, py_x, y)
+    for _ in range(20):
+        optimizer.apply_gradients(optimizer.compute_analytic_gradients(grad_fn, q))
+    assert q.logits.shape == (4, 10)
+    assert batched_vfe(q, p, py_x, y) < start
+
+def test_batched_gradient_matches_rows():
+    rng = np.random.default_rng(1)
+    q = BatchedDiscreteDistribution(logits=rng.normal(size=(3, 5)))
+    p = BatchedDiscreteDistribution(logits=rng.normal(size=(3, 5)))
+    grad = q.kl_divergence_gradient(p).reshape(3, 5)
+    for b in range(3):
+        np.testing.assert_allclose(grad[b], q[b].kl_divergence_gradient(p[b]))
@@ -0,0 +1,35 @@
+import json
+import numpy as np
+from core import instrumentation
+
+def test_percentiles_come_from_bounded_histograms():
+    durations = np.random.default_rng(0).lognormal(-7, 1, 20000)
+    instrumentation.reset()
+    instrumentation.enable()
+    try:
+        for duration in durations:
+            instrumentation.record('phase', 0.0, duration)
+        stats = instrumentation.summary()['phase']
+    finally:
+        instrumentation.disable()
+        instrumentation.reset()
+    assert stats['count'] == len(durations)
+    assert np.isclose(stats['total'], durations.sum())
+    # Half a log-spaced bucket is about 6% of the value
+    for key, exact in zip(['p50', 'p95', 'p99'], np.percentile(durations, [50, 95, 99])):
+        assert abs(stats[key] / exact - 1) < 0.07
+
+def test_trace_keeps_the_most_recent_events(tmp_path):
+    instrumentation.reset()
+    instrumentation.enable(trace=True, trace_capacity=10)
+    try:
+        for i in range(25):
+            instrumentation.record('phase', float(i), 1e-3)
+        path = tmp_path / 'trace.json'
+        instrumentation.write_chrome_trace(path)
+    finally:
+        instrumentation.disable()
+        instrumentation.reset()
+    trace = json.loads(path.read_text())
+    assert len(trace['traceEvents']) == 10
+    assert trace['otherData']['dropped_events'] == 15
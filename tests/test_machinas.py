@@ -0,0 +1,19 @@
+import numpy as np
+from core.machinas import MatrixMachina, IndexMachina
+
+A = np.arange(12, dtype=float).reshape(3, 4)
+
+def test_size_one_array_is_a_state_index():
+    machina = MatrixMachina(A)
+    for x in (2, [2], np.array([2]), np.array([2.0])):
+        assert np.array_equal(machina(x), A[:, 2])
+
+def test_integer_array_is_a_batch_of_state_indices():
+    machina = MatrixMachina(A)
+    assert np.array_equal(machina(np.array([2, 0, 3])), A[:, [2, 0, 3]].T)
+
+def test_index_machina_matches_matrix_machina():
+    index_machina = IndexMachina([0, 2, 1, 2], num_observations=3)
+    matrix_machina = MatrixMachina(index_machina.A)
+    for x in (1, [1], np.array([1]), np.array([3, 0, 1])):
+        assert np.array_equal(index_machina(x), matrix_machina(x))
@@ -0,0 +1,23 @@
+import numpy as np
+from applications.maze.population import MazePopulation
+from applications.maze.vector_environment import CUE_POSITION
+from applications.maze.generative_model.mapping import NUM_POSITIONS
+
+def test_population_collects_reward():
+    population = MazePopulation(200, seed=0)
+    trajectory = population.run(30)
+    assert trajectory['efe'].shape == (200, 30, population.num_actions ** 3)
+    assert trajectory['rewards'].sum() > 0
+    # Eating the snack ends the episode
+    assert np.all(trajectory['dones'][trajectory['rewards'] > 0])
+
+def test_rewards_follow_a_cue_visit():
+    trajectory = MazePopulation(200, seed=1, precision=2.0).run(30)
+    positions = trajectory['states'] % NUM_POSITIONS
+    for states, rewards, dones in zip(positions, trajectory['rewards'], trajectory['dones']):
+        cue_seen = False
+        for t in range(len(rewards)):
+            cue_seen |= states[t] == CUE_POSITION
+            assert cue_seen or not rewards[t]
+            if dones[t]:
+                cue_seen = False
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+from core.transitions import TransitionModel, deterministic_operator
+
+NUM_STATES, NUM_ACTIONS, BATCH = 6, 3, 4
+
+def transition_forms():
+    """The same deterministic transitions as a dense tensor, sparse matrices and implicit operators"""
+    sparse = pytest.importorskip('scipy.sparse')
+    next_states = np.random.default_rng(0).integers(NUM_STATES, size=(NUM_ACTIONS, NUM_STATES))
+    tensor = np.zeros((NUM_ACTIONS, NUM_STATES, NUM_STATES))
+    for a in range(NUM_ACTIONS):
+        tensor[a, next_states[a], np.arange(NUM_STATES)] = 1.0
+    return {
+        'tensor': TransitionModel(tensor),
+        'sparse': TransitionModel([sparse.csr_matrix(matrix) for matrix in tensor]),
+        'implicit': TransitionModel([deterministic_operator(next_state) for next_state in next_states]),
+    }
+
+def normalized(x):
+    return x / np.sum(x, axis=-1, keepdims=True)
+
+@pytest.mark.parametrize('state_shape, action_shape', [
+    ((NUM_STATES,), (NUM_ACTIONS,)),
+    ((BATCH, NUM_STATES), (NUM_ACTIONS,)),
+    ((NUM_STATES,), (BATCH, NUM_ACTIONS)),
+    ((BATCH, NUM_STATES), (BATCH, NUM_ACTIONS)),
+])
+def test_forms_propagate_identically(state_shape, action_shape):
+    rng = np.random.default_rng(1)
+    state = normalized(rng.random(state_shape))
+    action = normalized(rng.random(action_shape))
+
+    results = {name: model.propagate(state, action) for name, model in transition_forms().items()}
+    for name, result in results.items():
+        np.testing.assert_allclose(result, results['tensor'], err_msg=name)
+    np.testing.assert_allclose(np.sum(results['tensor'], axis=-1), 1.0)